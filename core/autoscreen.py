@@ -8,25 +8,34 @@ class AutoScreenError(RuntimeError):
     """Ошибка, связанная с автоматическим созданием скриншотов."""
 
 
+# Модуль pyautogui, импортируется лениво при первом нажатии
+_pyautogui = None
+
+
 def _press_with_pyautogui(key: str) -> None:
     """
     Отправляет нажатие клавиши через pyautogui.
 
+    Модуль импортируется один раз при первом вызове и кэшируется.
+
     Args:
         key: Название клавиши (например, "f12").
 
     Raises:
         AutoScreenError: Если не удалось импортировать или использовать pyautogui.
     """
-    try:
-        import pyautogui
-    except Exception as e:
-        raise AutoScreenError(
-            "Не удалось импортировать pyautogui. Установите пакет: pip install pyautogui"
-        ) from e
+    global _pyautogui
+    if _pyautogui is None:
+        try:
+            import pyautogui
+        except Exception as e:
+            raise AutoScreenError(
+                "Не удалось импортировать pyautogui. Установите пакет: pip install pyautogui"
+            ) from e
+        _pyautogui = pyautogui
 
     try:
-        pyautogui.press(key)
+        _pyautogui.press(key)
     except Exception as e:
         raise AutoScreenError(f"Ошибка отправки клавиши {key}: {e}") from e
 
@@ -88,11 +97,21 @@ class AutoScreener:
         self.key = key
         self._sender = sender
 
-        self._started_at: float | None = None
-        self._next_fire: float | None = None
+        # Внутренние расчёты — в целых наносекундах (time.monotonic_ns):
+        # без накопления ошибки float на длинных сессиях
+        self.interval_ns = round(self.interval * 1e9)
+        self.start_delay_ns = round(self.start_delay * 1e9)
+
+        self._started_at_ns: int | None = None
+        self._next_fire_ns: int | None = None
         self._remaining: int = self.count
         self._state: str = "idle"
 
+    @staticmethod
+    def _now_ns(now: float | None) -> int:
+        """Переводит время в секундах (для тестов) в нс или берёт time.monotonic_ns()."""
+        return round(now * 1e9) if now is not None else time.monotonic_ns()
+
     @property
     def state(self) -> str:
         """Текущее состояние планировщика."""
@@ -108,13 +127,14 @@ class AutoScreener:
         Запускает планировщик.
 
         Args:
-            now: Текущее время (для тестов). По умолчанию используется time.monotonic().
+            now: Текущее время в секундах (для тестов). По умолчанию используется
+                time.monotonic_ns().
         """
-        now = now if now is not None else time.monotonic()
-        self._started_at = now
-        self._next_fire = now + self.start_delay
+        now_ns = self._now_ns(now)
+        self._started_at_ns = now_ns
+        self._next_fire_ns = now_ns + self.start_delay_ns
         self._remaining = self.count
-        self._state = "countdown" if self.start_delay > 0 else "running"
+        self._state = "countdown" if self.start_delay_ns > 0 else "running"
 
     def stop(self) -> None:
         """Останавливает планировщик."""
@@ -125,22 +145,26 @@ class AutoScreener:
         Возвращает время (в секундах) до следующего нажатия.
 
         Args:
-            now: Текущее время (для тестов).
+            now: Текущее время в секундах (для тестов).
 
         Returns:
             float: Оставшееся время в секундах (неотрицательное).
         """
-        if self._next_fire is None:
+        return self._seconds_to_next_ns(self._now_ns(now))
+
+    def _seconds_to_next_ns(self, now_ns: int) -> float:
+        """seconds_to_next для времени в наносекундах."""
+        if self._next_fire_ns is None:
             return 0.0
-        now = now if now is not None else time.monotonic()
-        return max(0.0, self._next_fire - now)
+        return max(0, self._next_fire_ns - now_ns) / 1e9
 
     def tick(self, now: float | None = None) -> tuple[str, int, float]:
         """
         Выполняет шаг планировщика.
 
         Args:
-            now: Текущее время (для тестов). По умолчанию используется time.monotonic().
+            now: Текущее время в секундах (для тестов). По умолчанию используется
+                time.monotonic_ns().
 
         Returns:
             tuple[str, int, float]: (state, remaining, seconds_to_next)
@@ -148,20 +172,26 @@ class AutoScreener:
                 - remaining: оставшиеся нажатия.
                 - seconds_to_next: время до следующего нажатия.
         """
-        now = now if now is not None else time.monotonic()
         if self._state in ("done", "stopped", "idle"):
             return self._state, self.remaining, 0.0
 
-        if self._state == "countdown" and now >= (self._next_fire or now):
+        now_ns = self._now_ns(now)
+        next_fire_ns = self._next_fire_ns if self._next_fire_ns is not None else now_ns
+
+        if self._state == "countdown" and now_ns >= next_fire_ns:
             self._state = "running"
 
         if self._state == "running":
-            while self._remaining > 0 and now >= (self._next_fire or now):
+            if self._remaining > 0 and now_ns >= next_fire_ns:
+                # Если тики запоздали на несколько интервалов (UI подвис), не шлём
+                # пачку нажатий подряд — Steam их всё равно не успеет обработать.
+                # Делаем одно нажатие и переносим следующее на ближайший слот сетки.
                 press_hotkey(self.key, sender=self._sender)
                 self._remaining -= 1
-                self._next_fire = (self._next_fire or now) + self.interval
+                missed = (now_ns - next_fire_ns) // self.interval_ns
+                self._next_fire_ns = next_fire_ns + (missed + 1) * self.interval_ns
 
             if self._remaining == 0:
                 self._state = "done"
 
-        return self._state, self.remaining, self.seconds_to_next(now)
+        return self._state, self.remaining, self._seconds_to_next_ns(now_ns)
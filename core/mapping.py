@@ -1,13 +1,34 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+import io
+import os
+import struct
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import lru_cache
+from itertools import islice
 from pathlib import Path
-from typing import Iterable
+from typing import BinaryIO, Iterable
 
 from PIL import Image
 
+from core.scanner import FileEntry
 
-@dataclass(frozen=True)
+# Чтение заголовков упирается в задержки диска, а не в CPU — потоков берём с запасом
+_MAX_IO_WORKERS = min(16, (os.cpu_count() or 1) * 4)
+
+_PNG_MAGIC = b"\x89PNG\r\n\x1a\n"
+# Тип цвета PNG (IHDR) -> режим Pillow при глубине 8 бит
+_PNG_MODES = {0: "L", 2: "RGB", 3: "P", 4: "LA", 6: "RGBA"}
+# Число компонент JPEG -> режим Pillow
+_JPEG_MODES = {1: "L", 3: "RGB", 4: "CMYK"}
+# SOF-маркеры JPEG: все C0..CF, кроме DHT (C4), JPG (C8) и DAC (CC)
+_JPEG_SOF = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+# Сколько байт читать для разбора заголовка: хватает на SOF даже после небольшого EXIF
+_HEADER_PREFIX_BYTES = 16 * 1024
+
+
+@dataclass(frozen=True, slots=True)
 class ImageInfo:
     """Информация об изображении.
 
@@ -28,30 +49,134 @@ class ImageInfo:
     size_bytes: int
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Pair:
     """Пара файлов для замены содержимого.
 
     Attributes:
         old: Источник (контент берётся отсюда).
         new: Приёмник (имя файла сохраняется).
+        old_entry: Метаданные источника из сканера (если есть).
+        new_entry: Метаданные приёмника из сканера (если есть).
     """
 
     old: Path
     new: Path
+    old_entry: FileEntry | None = field(default=None, compare=False, repr=False)
+    new_entry: FileEntry | None = field(default=None, compare=False, repr=False)
+
+    @classmethod
+    def of(cls, old: Path | FileEntry, new: Path | FileEntry) -> Pair:
+        """Создаёт пару из путей или FileEntry, сохраняя метаданные сканера."""
+        old_entry = old if isinstance(old, FileEntry) else None
+        new_entry = new if isinstance(new, FileEntry) else None
+        return cls(
+            old=old_entry.path if old_entry else old,
+            new=new_entry.path if new_entry else new,
+            old_entry=old_entry,
+            new_entry=new_entry,
+        )
 
 
-def get_image_info(p: Path) -> ImageInfo:
+def get_image_info(p: Path | FileEntry) -> ImageInfo:
     """Читает базовую информацию об изображении.
 
+    Результат кэшируется по (путь, mtime, размер), поэтому повторный
+    предпросмотр или проверка формата тех же файлов не открывает их заново.
+
     Args:
-        p: Путь к изображению.
+        p: Путь к изображению или FileEntry из сканера (тогда stat() не вызывается).
 
     Returns:
         ImageInfo: Информация об изображении.
     """
+    if isinstance(p, FileEntry):
+        return _get_image_info_cached(str(p.path), p.mtime_ns, p.size)
+    st = p.stat()
+    return _get_image_info_cached(str(p), st.st_mtime_ns, st.st_size)
+
+
+def _read_header(f: BinaryIO) -> tuple[str, int, int, str] | None:
+    """Разбирает заголовок PNG/JPEG без Pillow.
+
+    Args:
+        f: Бинарный поток, спозиционированный на начало файла.
+
+    Returns:
+        tuple[str, int, int, str] | None: (формат, ширина, высота, режим) или None,
+            если формат не распознан или заголовок нестандартный.
+    """
+    head = f.read(26)
+    if head.startswith(_PNG_MAGIC):
+        if len(head) < 26 or head[12:16] != b"IHDR":
+            return None
+        width, height, depth, color = struct.unpack(">IIBB", head[16:26])
+        mode = _PNG_MODES.get(color)
+        if mode is None or (depth != 8 and color != 3):
+            return None
+        return "PNG", width, height, mode
+
+    if head[:2] != b"\xff\xd8":
+        return None
+
+    # Идём по сегментам JPEG до первого SOF (перед ним обычно APP/DQT/DHT)
+    f.seek(2)
+    while True:
+        seg = f.read(4)
+        if len(seg) < 4 or seg[0] != 0xFF:
+            return None
+        if seg[1] == 0xFF:
+            # Байт-заполнитель перед маркером
+            f.seek(-3, os.SEEK_CUR)
+            continue
+        seg_len = int.from_bytes(seg[2:4], "big")
+        if seg[1] in _JPEG_SOF:
+            sof = f.read(6)
+            if len(sof) < 6:
+                return None
+            height, width = struct.unpack(">HH", sof[1:5])
+            mode = _JPEG_MODES.get(sof[5])
+            if mode is None or not width or not height:
+                return None
+            return "JPEG", width, height, mode
+        if seg_len < 2:
+            return None
+        f.seek(seg_len - 2, os.SEEK_CUR)
+
+
+def _read_file_prefix(p: Path, n: int) -> bytes:
+    """Читает первые n байт файла.
+
+    Без буферизованного file-объекта: только open + read + close, без
+    дополнительных fstat/isatty/lseek, которые делает встроенный open().
+    """
+    fd = os.open(p, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+    try:
+        return os.read(fd, n)
+    finally:
+        os.close(fd)
+
+
+@lru_cache(maxsize=4096)
+def _get_image_info_cached(path_str: str, mtime_ns: int, size: int) -> ImageInfo:
+    """Читает информацию об изображении (кэшируемая часть get_image_info).
+
+    Args:
+        path_str: Путь к изображению в виде строки.
+        mtime_ns: Время модификации файла (наносекунды), часть ключа кэша.
+        size: Размер файла в байтах.
+
+    Returns:
+        ImageInfo: Информация об изображении.
+    """
+    p = Path(path_str)
+    header = _read_header(io.BytesIO(_read_file_prefix(p, _HEADER_PREFIX_BYTES)))
+    if header is not None:
+        fmt, width, height, mode = header
+        return ImageInfo(path=p, width=width, height=height, mode=mode, fmt=fmt, size_bytes=size)
+
+    # Размеры, режим и формат Pillow берёт из заголовка — декодировать пиксели не нужно
     with Image.open(p) as im:
-        im.load()
         fmt = (im.format or "").upper()
         return ImageInfo(
             path=p,
@@ -59,21 +184,21 @@ def get_image_info(p: Path) -> ImageInfo:
             height=int(im.height),
             mode=str(im.mode),
             fmt=fmt,
-            size_bytes=p.stat().st_size,
+            size_bytes=size,
         )
 
 
 def build_pairs(
-        old_files: list[Path],
-        new_files: list[Path],
+        old_files: list[Path] | list[FileEntry],
+        new_files: list[Path] | list[FileEntry],
         n: int | None = None,
         strict_equal: bool = False,
 ) -> tuple[list[Pair], list[str]]:
     """Формирует список пар файлов для замены.
 
     Args:
-        old_files: Список файлов-источников.
-        new_files: Список файлов-приёмников.
+        old_files: Список файлов-источников (пути или FileEntry из сканера).
+        new_files: Список файлов-приёмников (пути или FileEntry из сканера).
         n: Максимальное количество пар. По умолчанию берётся минимальное
            из двух списков.
         strict_equal: Если True — требует равное количество файлов.
@@ -104,44 +229,111 @@ def build_pairs(
             f"Ограничение по количеству: {n} (OLD={len(old_files)}, NEW={len(new_files)})"
         )
 
-    pairs = [Pair(old=o, new=nw) for o, nw in zip(old_files[:n], new_files[:n])]
+    pairs = [Pair.of(o, nw) for o, nw in islice(zip(old_files, new_files), n)]
     return pairs, warnings
 
 
+def _safe_image_info(p: Path | FileEntry) -> ImageInfo | Exception:
+    """Вызывает get_image_info, возвращая исключение вместо его выброса."""
+    try:
+        return get_image_info(p)
+    except Exception as e:
+        return e
+
+
+def _image_infos(paths: list[Path | FileEntry]) -> list[ImageInfo | Exception]:
+    """Читает информацию о нескольких изображениях параллельно.
+
+    Args:
+        paths: Список путей к изображениям (или FileEntry).
+
+    Returns:
+        list[ImageInfo | Exception]: Результаты в порядке входного списка;
+            для нечитаемых файлов — исключение.
+    """
+    if len(paths) <= 1:
+        return [_safe_image_info(p) for p in paths]
+    with ThreadPoolExecutor(max_workers=min(_MAX_IO_WORKERS, len(paths))) as ex:
+        return list(ex.map(_safe_image_info, paths))
+
+
+def _cached_infos(
+        paths: list[Path | FileEntry],
+        cache: dict[Path, ImageInfo | Exception] | None,
+) -> list[ImageInfo | Exception]:
+    """Как _image_infos, но берёт готовые результаты из cache и дополняет его.
+
+    Args:
+        paths: Список путей к изображениям (или FileEntry).
+        cache: Словарь результатов probe_pairs (или None — читать всё).
+
+    Returns:
+        list[ImageInfo | Exception]: Результаты в порядке входного списка.
+    """
+    if cache is None:
+        return _image_infos(paths)
+    keys = [p.path if isinstance(p, FileEntry) else p for p in paths]
+    missing = {k: p for k, p in zip(keys, paths) if k not in cache}
+    if missing:
+        cache.update(zip(missing, _image_infos(list(missing.values()))))
+    return [cache[k] for k in keys]
+
+
+def probe_pairs(pairs: Iterable[Pair]) -> dict[Path, ImageInfo | Exception]:
+    """Читает информацию обо всех файлах пар один раз (параллельно).
+
+    Результат можно передать в preview_pairs и probe_conversion_warnings
+    через аргумент cache, чтобы они не читали заголовки повторно.
+
+    Args:
+        pairs: Итератор пар файлов.
+
+    Returns:
+        dict[Path, ImageInfo | Exception]: Информация по пути файла;
+            для нечитаемых файлов — исключение.
+    """
+    cache: dict[Path, ImageInfo | Exception] = {}
+    _cached_infos([p for pr in pairs for p in (pr.old_entry or pr.old, pr.new_entry or pr.new)], cache)
+    return cache
+
+
 def preview_pairs(
         pairs: Iterable[Pair],
         *,
         limit: int | None = 20,
+        cache: dict[Path, ImageInfo | Exception] | None = None,
 ) -> list[str]:
     """Готовит предпросмотр пар файлов.
 
     Показывает размеры и форматы изображений для первых `limit` записей.
+    Заголовки файлов читаются параллельно.
 
     Args:
         pairs: Итератор пар файлов.
         limit: Ограничение на количество строк предпросмотра.
+        cache: Результат probe_pairs; недостающие записи будут дочитаны и добавлены.
 
     Returns:
         list[str]: Список строк предпросмотра.
     """
+    selected = list(islice(pairs, limit))
+    infos = _cached_infos(
+        [p for pr in selected for p in (pr.old_entry or pr.old, pr.new_entry or pr.new)], cache
+    )
+
     lines: list[str] = []
-    count = 0
-    for pr in pairs:
-        try:
-            old_info = get_image_info(pr.old)
-            new_info = get_image_info(pr.new)
+    for i, pr in enumerate(selected):
+        old_info, new_info = infos[2 * i], infos[2 * i + 1]
+        err = old_info if isinstance(old_info, Exception) else new_info
+        if isinstance(err, Exception):
+            line = f"{pr.new.name} ← {pr.old.name} | ⚠️ ошибка чтения: {err}"
+        else:
             line = (
                 f"{pr.new.name} ← {pr.old.name} | "
                 f"OLD: {old_info.width}x{old_info.height} {old_info.fmt}, "
                 f"NEW: {new_info.width}x{new_info.height} {new_info.fmt}"
             )
-        except Exception as e:
-            line = f"{pr.new.name} ← {pr.old.name} | ⚠️ ошибка чтения: {e}"
-
         lines.append(line)
-        count += 1
-        if limit is not None and count >= limit:
-            break
     return lines
 
 
@@ -149,6 +341,7 @@ def probe_conversion_warnings(
         pairs: Iterable[Pair],
         *,
         force_format: str | None = None,
+        cache: dict[Path, ImageInfo | Exception] | None = None,
 ) -> list[str]:
     """Проверяет возможную перекодировку изображений.
 
@@ -156,35 +349,39 @@ def probe_conversion_warnings(
         pairs: Итератор пар файлов.
         force_format: Принудительный формат ("jpg" или "png").
             Если None — определяется по расширению файла-приёмника.
+        cache: Результат probe_pairs; недостающие записи будут дочитаны и добавлены.
 
     Returns:
         list[str]: Список предупреждений.
     """
+    pairs = list(pairs)
+    infos = _cached_infos([pr.old_entry or pr.old for pr in pairs], cache)
+
     warns: list[str] = []
     ff = (force_format or "").lower()
-    for pr in pairs:
-        try:
-            old_info = get_image_info(pr.old)
-            new_ext = pr.new.suffix.lower()
-            if ff in {"jpg", "jpeg"}:
-                if old_info.fmt != "JPEG":
-                    warns.append(
-                        f"{pr.new.name}: принудительно JPEG (OLD был {old_info.fmt or '?'})"
-                    )
-            elif ff == "png":
-                if old_info.fmt != "PNG":
-                    warns.append(
-                        f"{pr.new.name}: принудительно PNG (OLD был {old_info.fmt or '?'})"
-                    )
-            else:
-                if new_ext in {".jpg", ".jpeg"} and old_info.fmt != "JPEG":
-                    warns.append(
-                        f"{pr.new.name}: будет JPEG (OLD был {old_info.fmt or '?'})"
-                    )
-                if new_ext == ".png" and old_info.fmt != "PNG":
-                    warns.append(
-                        f"{pr.new.name}: будет PNG (OLD был {old_info.fmt or '?'})"
-                    )
-        except Exception as e:
-            warns.append(f"{pr.new.name}: ⚠️ ошибка чтения для проверки формата: {e}")
+    for pr, old_info in zip(pairs, infos):
+        if isinstance(old_info, Exception):
+            warns.append(f"{pr.new.name}: ⚠️ ошибка чтения для проверки формата: {old_info}")
+            continue
+
+        new_ext = pr.new.suffix.lower()
+        if ff in {"jpg", "jpeg"}:
+            if old_info.fmt != "JPEG":
+                warns.append(
+                    f"{pr.new.name}: принудительно JPEG (OLD был {old_info.fmt or '?'})"
+                )
+        elif ff == "png":
+            if old_info.fmt != "PNG":
+                warns.append(
+                    f"{pr.new.name}: принудительно PNG (OLD был {old_info.fmt or '?'})"
+                )
+        else:
+            if new_ext in {".jpg", ".jpeg"} and old_info.fmt != "JPEG":
+                warns.append(
+                    f"{pr.new.name}: будет JPEG (OLD был {old_info.fmt or '?'})"
+                )
+            if new_ext == ".png" and old_info.fmt != "PNG":
+                warns.append(
+                    f"{pr.new.name}: будет PNG (OLD был {old_info.fmt or '?'})"
+                )
     return warns
@@ -1,23 +1,76 @@
 from __future__ import annotations
 
+import errno
 import os
 import shutil
+import sys
 import tempfile
+import threading
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
 from dataclasses import dataclass
+from functools import lru_cache, partial
 from pathlib import Path
-from typing import Iterable
+from typing import Iterable, Iterator, Literal, Mapping
 
 from PIL import Image
 
-
-@dataclass(frozen=True)
+_JPEG_MAGIC = b"\xff\xd8\xff"
+_PNG_MAGIC = b"\x89PNG\r\n\x1a\n"
+
+# Параметры сохранения Pillow для перекодировки (optimize/compress_level — по encode_speed)
+_JPEG_SAVE_KW = {"format": "JPEG", "quality": 95}
+_PNG_SAVE_KW = {"format": "PNG"}
+
+EncodeSpeed = Literal["fast", "balanced", "small", "png-small"]
+
+# encode_speed -> (optimize для JPEG, optimize для PNG, compress_level для PNG).
+# "fast" по умолчанию: deflate в libpng/zlib — главный расход CPU при записи PNG,
+# а размер файла для локальной выгрузки в Steam некритичен.
+# "png-small" сжимает максимально только PNG, JPEG кодируется как в "fast".
+_ENCODE_SPEED: dict[str, tuple[bool, bool, int]] = {
+    "fast": (False, False, 1),
+    "balanced": (False, False, 6),
+    "small": (True, True, 9),
+    "png-small": (False, True, 9),
+}
+
+# Потоков по умолчанию для replace_many и iter_replace_threaded: Pillow и копирование отпускают GIL,
+# но выше ~8 потоков упор уже в диск
+_DEFAULT_THREADS = min(8, os.cpu_count() or 1)
+
+# Размер буфера для копирования через os.read/os.write: буфер закреплён за каждым
+# потоком пула, поэтому он небольшой — несколько системных вызовов на скриншот дешевле памяти
+_COPY_CHUNK = 1 << 20
+
+# Буфер копирования на поток: переиспользуется между файлами вместо нового bytes на каждый read
+_copy_tls = threading.local()
+
+# Ошибки, при которых копирование средствами ядра не поддерживается для этой пары
+# файлов/ФС, и нужно перейти к следующему способу (как в shutil._fastcopy_sendfile)
+_KERNEL_COPY_UNSUPPORTED = frozenset({
+    errno.EXDEV, errno.ENOTSUP, errno.EOPNOTSUPP, errno.ENOSYS, errno.EINVAL, errno.ENOTSOCK,
+})
+
+# Маркеры, которые сохраняются при lossless-переписывании JPEG: APP0 (JFIF) и APP14 (Adobe,
+# влияет на трактовку цветов). Остальные APPn и COM (EXIF, ICC, XMP, комментарии) отбрасываются.
+_JPEG_KEEP_APP = frozenset({0xE0, 0xEE})
+# Маркеры без поля длины: TEM и RST0..RST7
+_JPEG_STANDALONE = frozenset({0x01, *range(0xD0, 0xD8)})
+# Маркеры SOFn (начало кадра); 0xC4 (DHT), 0xC8 (JPG) и 0xCC (DAC) в этом диапазоне — не SOF
+_JPEG_SOF = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+
+@dataclass(frozen=True, slots=True)
 class ReplaceResult:
     """Результат замены содержимого файла.
 
     Attributes:
         old: Путь к исходному файлу.
         new: Путь к файлу-назначению.
-        action: Действие ("copy-bytes", "reencode->JPEG", "reencode->PNG", "dry-run", "error").
+        action: Действие ("copy-bytes", "skip-identical", "jpeg-transform", "reencode->JPEG",
+            "reencode->PNG", "dry-run", "error").
         bytes_before: Размер файла до замены.
         bytes_after: Размер файла после замены (при dry-run = bytes_before).
         ok: Признак успешного завершения операции.
@@ -43,18 +96,33 @@ def _target_format_for(new_path: Path, force_format: str | None) -> str:
     Returns:
         str: Целевой формат ("JPEG" или "PNG").
 
+    Raises:
+        ValueError: Если передан неподдерживаемый force_format.
+    """
+    return _resolve_fmt(new_path.suffix.lower(), force_format.lower() if force_format else None)
+
+
+@lru_cache(maxsize=32)
+def _resolve_fmt(ext: str, force_format: str | None) -> str:
+    """Кэшируемая часть _target_format_for: зависит только от расширения и force_format.
+
+    Args:
+        ext: Расширение файла-назначения в нижнем регистре.
+        force_format: Принудительный формат в нижнем регистре или None.
+
+    Returns:
+        str: Целевой формат ("JPEG" или "PNG").
+
     Raises:
         ValueError: Если передан неподдерживаемый force_format.
     """
     if force_format:
-        f = force_format.lower()
-        if f in {"jpg", "jpeg"}:
+        if force_format in {"jpg", "jpeg"}:
             return "JPEG"
-        if f == "png":
+        if force_format == "png":
             return "PNG"
         raise ValueError(f"Неизвестный force_format: {force_format}")
 
-    ext = new_path.suffix.lower()
     if ext in {".jpg", ".jpeg"}:
         return "JPEG"
     if ext == ".png":
@@ -89,50 +157,334 @@ def _write_atomic(dst_path: Path, write_fn) -> None:
         raise
 
 
+def _copy_in_kernel(src_fd: int, dst_fd: int, size: int) -> int:
+    """Копирует до size байт из src_fd в dst_fd без передачи данных через Python.
+
+    Сначала os.copy_file_range (Linux; на Btrfs/XFS может сделать reflink без
+    копирования данных), затем os.sendfile. Оба вызова двигают позиции файлов,
+    поэтому при отказе одного способа следующий продолжает с того же места.
+
+    Returns:
+        int: Сколько байт скопировано. Меньше size, если ядро не умеет копировать
+            эту пару файлов — остаток дописывает вызывающий код.
+    """
+    copied = 0
+    for name in ("copy_file_range", "sendfile"):
+        fn = getattr(os, name, None)
+        if fn is None:
+            continue
+        try:
+            while copied < size:
+                if name == "copy_file_range":
+                    n = fn(src_fd, dst_fd, size - copied)
+                else:
+                    n = fn(dst_fd, src_fd, None, size - copied)
+                if n == 0:
+                    return copied
+                copied += n
+            return copied
+        except OSError as e:
+            if e.errno not in _KERNEL_COPY_UNSUPPORTED:
+                raise
+    return copied
+
+
+def _copy_buffer() -> bytearray:
+    """Возвращает буфер размера _COPY_CHUNK, закреплённый за текущим потоком."""
+    buf = getattr(_copy_tls, "buf", None)
+    if buf is None or len(buf) != _COPY_CHUNK:
+        buf = _copy_tls.buf = bytearray(_COPY_CHUNK)
+    return buf
+
+
+def _copy_raw(src: Path, dst: Path) -> None:
+    """Копирует файл средствами ядра, иначе через os.read/os.write большими блоками.
+
+    Переносимый вариант без буферизованных file-объектов Python: на Windows (где
+    нет ни copy_file_range, ни sendfile) чтение идёт блоками по _COPY_CHUNK в
+    переиспользуемый буфер потока (readinto). Если ядро скопировало весь файл,
+    буфер не нужен и не создаётся.
+    """
+    binary = getattr(os, "O_BINARY", 0)
+    src_fd = os.open(src, os.O_RDONLY | binary)
+    try:
+        dst_fd = os.open(dst, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | binary, 0o644)
+        try:
+            size = os.fstat(src_fd).st_size
+            if hasattr(os, "posix_fadvise"):
+                # Подсказка ядру: читать источник крупным упреждающим окном
+                os.posix_fadvise(src_fd, 0, size, os.POSIX_FADV_SEQUENTIAL)
+            if _copy_in_kernel(src_fd, dst_fd, size) >= size:
+                return
+            buf = _copy_buffer()
+            with open(src_fd, "rb", buffering=0, closefd=False) as reader, memoryview(buf) as whole:
+                while n := reader.readinto(buf):
+                    view = whole[:n]
+                    while view:
+                        view = view[os.write(dst_fd, view):]
+        finally:
+            os.close(dst_fd)
+    finally:
+        os.close(src_fd)
+
+
 def _copy_bytes_atomic(src: Path, dst: Path) -> None:
-    """Копирует файл побайтово с атомарной заменой."""
+    """Копирует файл побайтово с атомарной заменой.
+
+    На macOS shutil.copyfile использует fcopyfile (клонирование на APFS);
+    в остальных случаях — _copy_raw (copy_file_range/sendfile или read/write).
+    """
 
     def _do_write(tmp_path: Path) -> None:
-        with src.open("rb") as rf, tmp_path.open("wb") as wf:
-            shutil.copyfileobj(rf, wf, length=1024 * 1024)
+        if sys.platform == "darwin":
+            shutil.copyfile(src, tmp_path)
+        else:
+            _copy_raw(src, tmp_path)
 
     _write_atomic(dst, _do_write)
 
 
-def _reencode_atomic(src: Path, dst: Path, fmt: str) -> None:
+def _same_bytes(a: Path, b: Path) -> bool:
+    """Сравнивает содержимое двух файлов одинакового размера блоками _COPY_CHUNK.
+
+    Прямое сравнение дешевле хеширования: оба файла читаются не больше одного раза,
+    а на первом различии чтение прекращается.
+    """
+    with a.open("rb") as fa, b.open("rb") as fb:
+        while True:
+            chunk = fa.read(_COPY_CHUNK)
+            if chunk != fb.read(_COPY_CHUNK):
+                return False
+            if not chunk:
+                return True
+
+
+def _jpeg_transform_atomic(src: Path, dst: Path) -> int:
+    """Переписывает JPEG без метаданных, не трогая сжатые данные (lossless).
+
+    Аналог tjTransform с TJXOP_NONE + TJXOPT_COPYNONE: сегменты до SOS
+    копируются без APPn/COM, энтропийно-кодированные данные — как есть.
+    Без декодирования пикселей и без потери качества.
+
+    Args:
+        src: Путь к исходному JPEG.
+        dst: Путь к файлу-назначению.
+
+    Returns:
+        int: Размер записанного файла в байтах.
+
+    Raises:
+        ValueError: Если структура JPEG не распознана или в кадре не 1 и не 3
+            компонента (CMYK/YCCK нужно перекодировать в RGB).
+    """
+    data = src.read_bytes()
+    if not data.startswith(_JPEG_MAGIC):
+        raise ValueError("Файл не является JPEG")
+
+    parts = [data[:2]]
+    pos = 2
+    while True:
+        if pos + 2 > len(data) or data[pos] != 0xFF:
+            raise ValueError("Повреждённая структура JPEG")
+        marker = data[pos + 1]
+        if marker == 0xFF:
+            # Байт-заполнитель перед маркером
+            pos += 1
+            continue
+        if marker == 0xDA:
+            # SOS: дальше сжатые данные до EOI — копируем без изменений
+            parts.append(data[pos:])
+            break
+        if marker in _JPEG_STANDALONE:
+            parts.append(data[pos:pos + 2])
+            pos += 2
+            continue
+        seg_end = pos + 2 + int.from_bytes(data[pos + 2:pos + 4], "big")
+        if seg_end > len(data):
+            raise ValueError("Повреждённая структура JPEG")
+        # SOFn: FF Cn, длина (2), точность (1), высота (2), ширина (2), число компонент (1)
+        if marker in _JPEG_SOF and (seg_end < pos + 10 or data[pos + 9] not in (1, 3)):
+            raise ValueError("JPEG не в оттенках серого и не в RGB/YCbCr")
+        is_meta = 0xE0 <= marker <= 0xEF or marker == 0xFE
+        if not is_meta or marker in _JPEG_KEEP_APP:
+            parts.append(data[pos:seg_end])
+        pos = seg_end
+
+    payload = b"".join(parts)
+    _write_atomic(dst, lambda tmp_path: tmp_path.write_bytes(payload))
+    return len(payload)
+
+
+def _load_pyvips():
+    """Возвращает модуль pyvips, если он включён (USE_PYVIPS=1) и установлен, иначе None."""
+    if os.environ.get("USE_PYVIPS") != "1":
+        return None
+    try:
+        import pyvips
+    except Exception:
+        return None
+    return pyvips
+
+
+def _reencode_with_pyvips(
+        pyvips,
+        src: Path,
+        tmp_path: Path,
+        fmt: str,
+        optimize: bool,
+        compress_level: int,
+) -> bool:
+    """Перекодирует изображение через libvips (потоковое чтение, многопоточный кодер).
+
+    Returns:
+        bool: True при успехе; False, если нужно откатиться на Pillow.
+    """
+    try:
+        image = pyvips.Image.new_from_file(str(src), access="sequential")
+        if fmt == "JPEG":
+            image.jpegsave(str(tmp_path), Q=95, optimize_coding=optimize, strip=True)
+        elif fmt == "PNG":
+            image.pngsave(str(tmp_path), compression=compress_level, strip=True)
+        else:
+            return False
+    except Exception:
+        return False
+    return True
+
+
+def _prepare_for_save(im: Image.Image, fmt: str) -> Image.Image:
+    """Приводит цветовой режим изображения к поддерживаемому целевым форматом.
+
+    Raises:
+        ValueError: Если указан неподдерживаемый формат.
+    """
+    if fmt == "JPEG":
+        if im.mode not in ("RGB", "L"):
+            return im.convert("RGB")
+    elif fmt == "PNG":
+        # RGBA только при реальной прозрачности: иначе libpng фильтрует и сжимает лишние каналы
+        if im.mode == "P":
+            return im.convert("RGBA" if "transparency" in im.info else "RGB")
+        if im.mode == "LA":
+            return im.convert("L" if im.getchannel("A").getextrema() == (255, 255) else "RGBA")
+    else:
+        raise ValueError(f"Неподдерживаемый формат назначения: {fmt}")
+    return im
+
+
+def _save_pillow(im: Image.Image, tmp_path: Path, fmt: str, encode_speed: EncodeSpeed) -> None:
+    """Сохраняет изображение через Pillow с параметрами для encode_speed."""
+    jpeg_optimize, png_optimize, compress_level = _ENCODE_SPEED[encode_speed]
+    if fmt == "JPEG":
+        im.save(tmp_path, optimize=jpeg_optimize, **_JPEG_SAVE_KW)
+    else:
+        im.save(tmp_path, optimize=png_optimize, compress_level=compress_level, **_PNG_SAVE_KW)
+
+
+def _shrink_to(im: Image.Image, target_size: tuple[int, int]) -> Image.Image:
+    """Уменьшает изображение, чтобы оно вписалось в target_size (с сохранением пропорций).
+
+    Для JPEG draft() включает масштабирование при декодировании (1/2, 1/4, 1/8 в
+    libjpeg): декодируется меньше коэффициентов DCT, до ближайшего масштаба не
+    меньше target_size; остаток доводит thumbnail().
+    """
+    if im.format == "JPEG":
+        im.draft("RGB", target_size)
+    im.thumbnail(target_size)
+    return im
+
+
+def _reencode_atomic(
+        src: Path,
+        dst: Path,
+        fmt: str,
+        encode_speed: EncodeSpeed = "fast",
+        target_size: tuple[int, int] | None = None,
+) -> None:
     """Перекодирует изображение в указанный формат.
 
+    Если задано USE_PYVIPS=1 и установлен pyvips, кодирование выполняет libvips.
+    Если pyvips недоступен или вернул ошибку, а также при заданном target_size
+    используется Pillow.
+
     Args:
         src: Путь к исходному файлу.
         dst: Путь к файлу-назначению.
         fmt: Целевой формат ("JPEG" или "PNG").
+        encode_speed: Баланс скорость/размер: "fast" — без оптимизации и с
+            compress_level=1 для PNG; "balanced" — стандартное сжатие PNG;
+            "small" — оптимальные таблицы Хаффмана для JPEG и максимальное сжатие PNG;
+            "png-small" — максимальное сжатие только для PNG.
+        target_size: Максимальный размер результата (ширина, высота); None — без изменения размера.
 
     Raises:
         ValueError: Если указан неподдерживаемый формат.
     """
+    optimize, _, compress_level = _ENCODE_SPEED[encode_speed]
+    native = target_size is None
+    pyvips = _load_pyvips() if native else None
 
     def _do_write(tmp_path: Path) -> None:
+        if pyvips is not None and _reencode_with_pyvips(
+            pyvips, src, tmp_path, fmt, optimize, compress_level
+        ):
+            return
         with Image.open(src) as im:
-            if fmt == "JPEG":
-                if im.mode not in ("RGB", "L"):
-                    im = im.convert("RGB")
-                im.save(tmp_path, format="JPEG", quality=95, optimize=True)
-            elif fmt == "PNG":
-                if im.mode in ("P", "LA"):
-                    im = im.convert("RGBA")
-                im.save(tmp_path, format="PNG", optimize=True)
-            else:
-                raise ValueError(f"Неподдерживаемый формат назначения: {fmt}")
+            if target_size is not None:
+                im = _shrink_to(im, target_size)
+            _save_pillow(_prepare_for_save(im, fmt), tmp_path, fmt, encode_speed)
 
     _write_atomic(dst, _do_write)
 
 
+def _sniff_format(path: Path) -> str | None:
+    """Определяет формат файла по сигнатуре (первые 8 байт).
+
+    Pillow открывается только если сигнатура не JPEG и не PNG.
+
+    Args:
+        path: Путь к файлу.
+
+    Returns:
+        str | None: "JPEG", "PNG", другой формат Pillow (например, "BMP") или None,
+            если формат не распознан или файл не удалось прочитать.
+    """
+    try:
+        with path.open("rb") as f:
+            head = f.read(8)
+    except OSError:
+        return None
+    if head.startswith(_JPEG_MAGIC):
+        return "JPEG"
+    if head == _PNG_MAGIC:
+        return "PNG"
+    try:
+        with Image.open(path) as im:
+            return (im.format or "").upper() or None
+    except Exception:
+        return None
+
+
+def _needs_reencode(old_path: Path, new_path: Path, force_format: str | None) -> bool:
+    """Проверяет, потребуется ли для пары перекодировка (а не копирование байтов)."""
+    if force_format is not None:
+        return True
+    try:
+        target_fmt = _target_format_for(new_path, force_format)
+    except ValueError:
+        return False
+    return _sniff_format(old_path) != target_fmt
+
+
 def replace_one(
         old_path: Path,
         new_path: Path,
         *,
         force_format: str | None = None,
         dry_run: bool = False,
+        encode_speed: EncodeSpeed = "fast",
+        target_size: tuple[int, int] | None = None,
+        src_fmt: str | None = None,
 ) -> ReplaceResult:
     """Заменяет содержимое одного файла изображением из другого.
 
@@ -141,11 +493,22 @@ def replace_one(
         new_path: Путь к файлу-назначению (имя сохраняется).
         force_format: Принудительный формат ("jpg" | "png").
         dry_run: Если True, операция только симулируется.
+        encode_speed: Баланс скорость/размер при перекодировке ("fast" | "balanced" | "small" | "png-small").
+        target_size: Если задан, изображение уменьшается до вписывания в этот размер
+            (всегда с перекодировкой). По умолчанию размер не меняется.
+        src_fmt: Уже известный формат OLD ("JPEG", "PNG", ...), например из
+            предпросмотра; если задан, сигнатура файла повторно не читается.
 
     Returns:
         ReplaceResult: Результат операции.
     """
-    bytes_before = new_path.stat().st_size if new_path.exists() else 0
+    # Один stat() вместо пары exists() + stat()
+    try:
+        bytes_before = new_path.stat().st_size
+        new_exists = True
+    except FileNotFoundError:
+        bytes_before = 0
+        new_exists = False
 
     if dry_run:
         return ReplaceResult(
@@ -157,30 +520,45 @@ def replace_one(
             ok=True,
         )
 
-    if not old_path.exists():
+    try:
+        old_size = old_path.stat().st_size
+    except FileNotFoundError:
         return ReplaceResult(old_path, new_path, "dry-run", bytes_before, bytes_before, False, "OLD не найден")
-    if not new_path.exists():
+    if not new_exists:
         return ReplaceResult(old_path, new_path, "dry-run", bytes_before, bytes_before, False, "NEW не найден")
 
     try:
         target_fmt = _target_format_for(new_path, force_format)
 
-        src_fmt: str | None = None
-        try:
-            with Image.open(old_path) as im:
-                src_fmt = (im.format or "").upper()
-        except Exception:
-            # Если Pillow не смог прочитать файл — пробуем перекодировать
-            pass
+        if src_fmt is None:
+            # Нераспознанный формат (None) — пробуем перекодировать через Pillow
+            src_fmt = _sniff_format(old_path)
 
-        if src_fmt == target_fmt and force_format is None:
+        if src_fmt == target_fmt and force_format is None and target_size is None:
+            if old_size == bytes_before and _same_bytes(old_path, new_path):
+                # NEW уже совпадает с OLD (повторный запуск) — писать нечего
+                return ReplaceResult(old_path, new_path, "skip-identical", bytes_before, bytes_before, True)
             _copy_bytes_atomic(old_path, new_path)
             action = "copy-bytes"
+            # Побайтовая копия — размер совпадает с исходником, stat() не нужен
+            bytes_after = old_size
         else:
-            _reencode_atomic(old_path, new_path, target_fmt)
-            action = f"reencode->{target_fmt}"
+            action = ""
+            if src_fmt == target_fmt == "JPEG" and target_size is None:
+                # Принудительный JPEG для JPEG-источника — без декодирования и потери качества
+                try:
+                    bytes_after = _jpeg_transform_atomic(old_path, new_path)
+                    action = "jpeg-transform"
+                except ValueError:
+                    pass
+            if not action:
+                _reencode_atomic(
+                    old_path, new_path, target_fmt,
+                    encode_speed=encode_speed, target_size=target_size,
+                )
+                action = f"reencode->{target_fmt}"
+                bytes_after = new_path.stat().st_size
 
-        bytes_after = new_path.stat().st_size if new_path.exists() else 0
         return ReplaceResult(
             old=old_path,
             new=new_path,
@@ -201,24 +579,238 @@ def replace_one(
         )
 
 
+def _bind_one(
+        force_format: str | None,
+        dry_run: bool,
+        encode_speed: EncodeSpeed,
+        src_fmts: Mapping[Path, str] | None,
+):
+    """Возвращает функцию (old, new) -> ReplaceResult с общими параметрами replace_one."""
+    one = partial(replace_one, force_format=force_format, dry_run=dry_run, encode_speed=encode_speed)
+    if not src_fmts:
+        return one
+    return lambda old_p, new_p: one(old_p, new_p, src_fmt=src_fmts.get(old_p))
+
+
 def replace_many(
         pairs: Iterable[tuple[Path, Path]],
         *,
         force_format: str | None = None,
         dry_run: bool = False,
+        encode_speed: EncodeSpeed = "fast",
+        max_workers: int | None = None,
+        processes: bool = False,
+        src_fmts: Mapping[Path, str] | None = None,
 ) -> list[ReplaceResult]:
     """Применяет replace_one ко всем парам файлов.
 
+    По умолчанию пары обрабатываются в пуле потоков: декодирование, кодирование
+    Pillow и копирование файлов отпускают GIL. С processes=True пары, которым
+    достаточно копирования байтов (упор в диск), остаются в пуле потоков, а пары
+    с перекодировкой (упор в CPU) уходят в пул процессов.
+    При dry-run или одной паре всё выполняется последовательно.
+
     Args:
         pairs: Итератор пар (old, new).
         force_format: Принудительный формат ("jpg" | "png").
         dry_run: Если True, операции только симулируются.
+        encode_speed: Баланс скорость/размер при перекодировке ("fast" | "balanced" | "small" | "png-small").
+        max_workers: Максимальное число воркеров в каждом пуле (по умолчанию
+            min(8, os.cpu_count()) потоков или os.cpu_count() процессов). 1 — без пулов:
+            декодирование следующего файла совмещается с кодированием текущего
+            (см. _pipeline_replace_many).
+        processes: Перекодировать в пуле процессов вместо пула потоков.
+        src_fmts: Известные форматы OLD-файлов (путь -> формат), см. replace_one.
+            В пул процессов не передаются.
+
+    Returns:
+        list[ReplaceResult]: Список результатов в порядке входных пар.
+    """
+    pairs = list(pairs)
+    one = _bind_one(force_format, dry_run, encode_speed, src_fmts)
+    if processes:
+        workers = max_workers or os.cpu_count() or 1
+    else:
+        workers = max_workers or _DEFAULT_THREADS
+    if dry_run or len(pairs) < 2:
+        return [one(old_p, new_p) for old_p, new_p in pairs]
+    if workers == 1:
+        if _load_pyvips() is not None:
+            return [one(old_p, new_p) for old_p, new_p in pairs]
+        return _pipeline_replace_many(
+            pairs, force_format=force_format, encode_speed=encode_speed, src_fmts=src_fmts,
+        )
+    if not processes:
+        with ThreadPoolExecutor(max_workers=min(workers, len(pairs))) as ex:
+            return list(ex.map(one, [old_p for old_p, _ in pairs], [new_p for _, new_p in pairs]))
+
+    copy_idx: list[int] = []
+    reencode_idx: list[int] = []
+    for i, (old_p, new_p) in enumerate(pairs):
+        (reencode_idx if _needs_reencode(old_p, new_p, force_format) else copy_idx).append(i)
+
+    results: dict[int, ReplaceResult] = {}
+    with ThreadPoolExecutor(max_workers=min(workers, max(1, len(copy_idx)))) as tp:
+        copy_futs = {i: tp.submit(one, *pairs[i]) for i in copy_idx}
+        if len(reencode_idx) > 1:
+            # partial без src_fmts: лямбду из _bind_one нельзя передать в процесс через pickle
+            reencode = partial(replace_one, force_format=force_format, encode_speed=encode_speed)
+            try:
+                with ProcessPoolExecutor(max_workers=min(workers, len(reencode_idx))) as pp:
+                    olds = [pairs[i][0] for i in reencode_idx]
+                    news = [pairs[i][1] for i in reencode_idx]
+                    results.update(zip(reencode_idx, pp.map(reencode, olds, news)))
+            except (BrokenProcessPool, OSError):
+                # Пул процессов недоступен — оставшиеся пары обработаем последовательно
+                pass
+        for i, fut in copy_futs.items():
+            results[i] = fut.result()
+
+    return [results[i] if i in results else one(*pr) for i, pr in enumerate(pairs)]
+
+
+def _decode_for_reencode(
+        old_path: Path,
+        new_path: Path,
+        force_format: str | None,
+        src_fmt: str | None,
+) -> tuple[Image.Image | None, str | None]:
+    """Стадия декодирования конвейера: открывает и полностью декодирует источник.
+
+    Returns:
+        tuple[Image.Image | None, str | None]: (готовое к сохранению изображение, формат OLD).
+            Изображение None, если пару нужно обработать обычным replace_one (копирование,
+            jpeg-transform, ошибки чтения); формат OLD передаётся ему, чтобы не читать
+            сигнатуру повторно.
+    """
+    try:
+        target_fmt = _target_format_for(new_path, force_format)
+        if src_fmt is None:
+            src_fmt = _sniff_format(old_path)
+        if src_fmt == target_fmt and (force_format is None or target_fmt == "JPEG"):
+            return None, src_fmt
+        with Image.open(old_path) as im:
+            im.load()
+            return _prepare_for_save(im, target_fmt), src_fmt
+    except Exception:
+        return None, src_fmt
+
+
+def _encode_decoded(
+        old_path: Path,
+        new_path: Path,
+        im: Image.Image,
+        fmt: str,
+        encode_speed: EncodeSpeed,
+) -> ReplaceResult:
+    """Стадия кодирования конвейера: сохраняет декодированное изображение в new_path."""
+    try:
+        bytes_before = new_path.stat().st_size
+    except FileNotFoundError:
+        return replace_one(old_path, new_path, encode_speed=encode_speed)
+
+    try:
+        _write_atomic(new_path, lambda tmp_path: _save_pillow(im, tmp_path, fmt, encode_speed))
+        bytes_after = new_path.stat().st_size
+    except Exception as e:
+        return ReplaceResult(old_path, new_path, "error", bytes_before, bytes_before, False, str(e))
+    return ReplaceResult(old_path, new_path, f"reencode->{fmt}", bytes_before, bytes_after, True)
+
+
+def _pipeline_replace_many(
+        pairs: list[tuple[Path, Path]],
+        *,
+        force_format: str | None = None,
+        encode_speed: EncodeSpeed = "fast",
+        src_fmts: Mapping[Path, str] | None = None,
+        depth: int = 2,
+) -> list[ReplaceResult]:
+    """Последовательная замена с совмещением декодирования и кодирования.
+
+    Отдельный поток декодирует следующие файлы (не более depth вперёд), пока
+    текущий поток кодирует и записывает предыдущий. Декодер и кодер Pillow
+    отпускают GIL, поэтому стадии выполняются одновременно даже без пула процессов.
+
+    Args:
+        pairs: Список пар (old, new).
+        force_format: Принудительный формат ("jpg" | "png").
+        encode_speed: Баланс скорость/размер при перекодировке.
+        src_fmts: Известные форматы OLD-файлов (путь -> формат), см. replace_one.
+        depth: Сколько декодированных изображений может ждать кодирования.
 
     Returns:
-        list[ReplaceResult]: Список результатов.
+        list[ReplaceResult]: Список результатов в порядке входных пар.
     """
     results: list[ReplaceResult] = []
-    for old_p, new_p in pairs:
-        res = replace_one(old_p, new_p, force_format=force_format, dry_run=dry_run)
-        results.append(res)
+    upcoming = iter(pairs)
+    pending: deque[Future] = deque()
+    src_fmts = src_fmts or {}
+
+    with ThreadPoolExecutor(max_workers=1) as decoder:
+
+        def _submit_next() -> None:
+            pr = next(upcoming, None)
+            if pr is not None:
+                pending.append(
+                    decoder.submit(_decode_for_reencode, *pr, force_format, src_fmts.get(pr[0]))
+                )
+
+        for _ in range(depth):
+            _submit_next()
+
+        for old_p, new_p in pairs:
+            im, src_fmt = pending.popleft().result()
+            _submit_next()
+            if im is None:
+                res = replace_one(
+                    old_p, new_p, force_format=force_format, encode_speed=encode_speed, src_fmt=src_fmt,
+                )
+            else:
+                fmt = _target_format_for(new_p, force_format)
+                res = _encode_decoded(old_p, new_p, im, fmt, encode_speed)
+            results.append(res)
+
     return results
+
+
+def iter_replace_threaded(
+        pairs: Iterable[tuple[Path, Path]],
+        *,
+        force_format: str | None = None,
+        dry_run: bool = False,
+        encode_speed: EncodeSpeed = "fast",
+        max_workers: int | None = None,
+        src_fmts: Mapping[Path, str] | None = None,
+) -> Iterator[ReplaceResult]:
+    """Выполняет replace_one для всех пар в пуле потоков, отдавая результаты по мере готовности.
+
+    В отличие от replace_many, результаты идут в порядке завершения,
+    а не в порядке входных пар: пару определяют поля old/new результата.
+
+    Args:
+        pairs: Итератор пар (old, new).
+        force_format: Принудительный формат ("jpg" | "png").
+        dry_run: Если True, операции только симулируются.
+        encode_speed: Баланс скорость/размер при перекодировке ("fast" | "balanced" | "small" | "png-small").
+        max_workers: Число потоков (по умолчанию min(8, os.cpu_count())).
+        src_fmts: Известные форматы OLD-файлов (путь -> формат), см. replace_one.
+
+    Yields:
+        ReplaceResult: Результат для очередной завершённой пары.
+
+    Если генератор закрыт досрочно (close() или выход из цикла), ещё не начатые
+    пары отменяются, а close() ждёт только уже выполняющиеся.
+    """
+    if not isinstance(pairs, list):  # очередь из UI передаётся без копирования
+        pairs = list(pairs)
+    if not pairs:
+        return
+    one = _bind_one(force_format, dry_run, encode_speed, src_fmts)
+    ex = ThreadPoolExecutor(max_workers=min(max_workers or _DEFAULT_THREADS, len(pairs)))
+    try:
+        futs = [ex.submit(one, old_p, new_p) for old_p, new_p in pairs]
+        for fut in as_completed(futs):
+            yield fut.result()
+    finally:
+        # Запись атомарная: прерывание между парами не оставляет полузаписанных файлов
+        ex.shutdown(wait=True, cancel_futures=True)
@@ -1,4 +1,64 @@
+import os
+from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
+from typing import Sequence, TypeVar
+
+
+@dataclass(frozen=True, slots=True)
+class FileEntry:
+    """Файл, найденный при сканировании, вместе с метаданными из os.scandir.
+
+    Позволяет не вызывать stat() повторно при чтении информации об изображении:
+    на Windows размер и mtime приходят вместе с листингом директории.
+
+    Attributes:
+        path: Путь к файлу.
+        size: Размер файла в байтах.
+        mtime_ns: Время модификации файла (наносекунды).
+    """
+
+    path: Path
+    size: int
+    mtime_ns: int
+
+    @property
+    def name(self) -> str:
+        """Имя файла."""
+        return self.path.name
+
+
+_T = TypeVar("_T")
+
+
+@lru_cache(maxsize=8)
+def _allowed_exts(exts: tuple[str, ...]) -> frozenset[str]:
+    """Множество допустимых расширений (с точкой, в нижнем регистре)."""
+    return frozenset(ext.lower() for ext in exts)
+
+
+def _scan_image_dirents(dir_path: Path, exts: tuple[str, ...]) -> list[os.DirEntry[str]]:
+    """Возвращает записи os.scandir, подходящие под расширения exts.
+
+    is_file(follow_symlinks=False) берёт тип из самого листинга (d_type на Linux,
+    атрибуты FindNextFile на Windows), поэтому отдельный stat() на файл не нужен.
+    Симлинки пропускаются.
+    """
+    allowed = _allowed_exts(exts)
+    found: list[os.DirEntry[str]] = []
+    with os.scandir(dir_path) as it:
+        for entry in it:
+            name = entry.name
+            dot = name.rfind(".")
+            if dot == -1:
+                continue
+            ext = name[dot:]
+            # Имена Steam в нижнем регистре: lower() нужен только для остальных
+            if ext not in allowed and ext.lower() not in allowed:
+                continue
+            if entry.is_file(follow_symlinks=False):
+                found.append(entry)
+    return found
 
 
 def list_images_raw(dir_path: Path, exts: tuple[str, ...] = (".jpg", ".png")) -> list[Path]:
@@ -23,11 +83,62 @@ def list_images_raw(dir_path: Path, exts: tuple[str, ...] = (".jpg", ".png")) ->
     if not dir_path.is_dir():
         raise NotADirectoryError(f"Указанный путь не является директорией: {dir_path}")
 
-    files: list[Path] = []
-    for entry in dir_path.iterdir():
-        if entry.is_file() and entry.suffix.lower() in exts:
-            files.append(entry)
-    return files
+    return [Path(entry.path) for entry in _scan_image_dirents(dir_path, exts)]
+
+
+def list_image_entries(dir_path: Path, exts: tuple[str, ...] = (".jpg", ".png")) -> list[FileEntry]:
+    """Возвращает файлы изображений из указанной папки вместе с размером и mtime.
+
+    Аналог list_images_raw, но сохраняет метаданные os.DirEntry.
+
+    Args:
+        dir_path: Путь к директории.
+        exts: Допустимые расширения файлов.
+
+    Returns:
+        list[FileEntry]: Список найденных файлов.
+
+    Raises:
+        FileNotFoundError: Если директория не существует.
+        NotADirectoryError: Если путь не является директорией.
+    """
+    if not dir_path.exists():
+        raise FileNotFoundError(f"Директория не найдена: {dir_path}")
+
+    if not dir_path.is_dir():
+        raise NotADirectoryError(f"Указанный путь не является директорией: {dir_path}")
+
+    entries: list[FileEntry] = []
+    for entry in _scan_image_dirents(dir_path, exts):
+        st = entry.stat(follow_symlinks=False)
+        entries.append(FileEntry(Path(entry.path), st.st_size, st.st_mtime_ns))
+    return entries
+
+
+def _limit_old_new(
+        old_files: Sequence[_T],
+        new_files: Sequence[_T],
+        n: int | None,
+) -> tuple[list[_T], list[_T], list[str]]:
+    """Урезает списки OLD/NEW до n элементов и собирает предупреждения (см. scan_old_new)."""
+    warnings: list[str] = []
+
+    if not old_files:
+        warnings.append("Папка OLD пуста")
+    if not new_files:
+        warnings.append("Папка NEW пуста")
+
+    if n is None:
+        n = len(old_files)
+
+    if len(new_files) < n:
+        warnings.append(
+            f"Файлов в NEW меньше ({len(new_files)}) чем в OLD ({len(old_files)}). "
+            f"Будет использовано {len(new_files)} пар."
+        )
+        n = len(new_files)
+
+    return list(old_files[:n]), list(new_files[:n]), warnings
 
 
 def scan_old_new(old_dir: Path, new_dir: Path, n: int | None = None) -> tuple[list[Path], list[Path], list[str]]:
@@ -49,24 +160,29 @@ def scan_old_new(old_dir: Path, new_dir: Path, n: int | None = None) -> tuple[li
             - Список файлов из NEW.
             - Список предупреждений.
     """
-    warnings: list[str] = []
-
     old_files = list_images_raw(old_dir)
     new_files = list_images_raw(new_dir)
+    return _limit_old_new(old_files, new_files, n)
 
-    if not old_files:
-        warnings.append("Папка OLD пуста")
-    if not new_files:
-        warnings.append("Папка NEW пуста")
 
-    if n is None:
-        n = len(old_files)
+def scan_old_new_entries(
+        old_dir: Path,
+        new_dir: Path,
+        n: int | None = None,
+) -> tuple[list[FileEntry], list[FileEntry], list[str]]:
+    """То же, что scan_old_new, но возвращает FileEntry с размером и mtime.
 
-    if len(new_files) < n:
-        warnings.append(
-            f"Файлов в NEW меньше ({len(new_files)}) чем в OLD ({len(old_files)}). "
-            f"Будет использовано {len(new_files)} пар."
-        )
-        n = len(new_files)
+    Args:
+        old_dir: Путь к директории с исходными файлами (OLD).
+        new_dir: Путь к директории с файлами-назначениями (NEW).
+        n: Максимальное количество файлов (по умолчанию равно количеству в OLD).
 
-    return old_files[:n], new_files[:n], warnings
+    Returns:
+        tuple[list[FileEntry], list[FileEntry], list[str]]:
+            - Список файлов из OLD.
+            - Список файлов из NEW.
+            - Список предупреждений.
+    """
+    old_files = list_image_entries(old_dir)
+    new_files = list_image_entries(new_dir)
+    return _limit_old_new(old_files, new_files, n)
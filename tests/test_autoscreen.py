@@ -0,0 +1,27 @@
+from core.autoscreen import AutoScreener
+
+
+def test_autoscreener_presses_on_schedule() -> None:
+    """Проверяет стартовую задержку и нажатия с заданным интервалом."""
+    presses: list[str] = []
+    runner = AutoScreener(count=3, interval_sec=1.0, start_delay_sec=2.0, sender=presses.append)
+    runner.start(now=0.0)
+
+    assert runner.tick(now=1.0) == ("countdown", 3, 1.0)
+    assert runner.tick(now=2.0) == ("running", 2, 1.0)
+    assert runner.tick(now=3.0)[:2] == ("running", 1)
+    assert runner.tick(now=4.0)[:2] == ("done", 0)
+    assert presses == ["f12", "f12", "f12"]
+
+
+def test_autoscreener_no_burst_after_stall() -> None:
+    """Проверяет, что после долгой паузы отправляется одно нажатие, а не пачка."""
+    presses: list[str] = []
+    runner = AutoScreener(count=5, interval_sec=1.0, start_delay_sec=0.0, sender=presses.append)
+    runner.start(now=0.0)
+
+    state, remaining, to_next = runner.tick(now=3.5)
+    assert len(presses) == 1
+    assert (state, remaining) == ("running", 4)
+    # Следующее нажатие — на ближайшем слоте сетки (t=4.0)
+    assert to_next == 0.5
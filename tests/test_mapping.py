@@ -1,7 +1,16 @@
 from pathlib import Path
 from PIL import Image
 
-from core.mapping import build_pairs, get_image_info
+from core import mapping
+from core.mapping import (
+    Pair,
+    _read_header,
+    build_pairs,
+    get_image_info,
+    preview_pairs,
+    probe_conversion_warnings,
+    probe_pairs,
+)
 
 
 def _make_img(path: Path, size=(16, 16), color=(128, 128, 128), fmt="JPEG") -> None:
@@ -57,3 +66,97 @@ def test_preview_pairs_and_info(tmp_path: Path) -> None:
     assert info.width == 10
     assert info.height == 12
     assert info.fmt == "JPEG"
+
+
+def test_get_image_info_cache_invalidated_on_change(tmp_path: Path) -> None:
+    """Проверяет, что кэш get_image_info сбрасывается при изменении файла."""
+    img = tmp_path / "img.png"
+    _make_img(img, size=(10, 10), fmt="PNG")
+    assert get_image_info(img).width == 10
+
+    _make_img(img, size=(20, 30), fmt="PNG")
+    info = get_image_info(img)
+    assert (info.width, info.height) == (20, 30)
+
+
+def test_preview_and_probe_keep_order_and_errors(tmp_path: Path) -> None:
+    """Проверяет порядок строк и обработку ошибок при параллельном чтении."""
+    pairs = []
+    for i in range(5):
+        old = tmp_path / f"old{i}.png"
+        new = tmp_path / f"new{i}.jpg"
+        _make_img(old, size=(10 + i, 10), fmt="PNG")
+        _make_img(new, fmt="JPEG")
+        pairs.append(Pair(old=old, new=new))
+    pairs.append(Pair(old=tmp_path / "missing.png", new=tmp_path / "new_missing.jpg"))
+
+    lines = preview_pairs(pairs, limit=None)
+    assert len(lines) == 6
+    for i in range(5):
+        assert f"OLD: {10 + i}x10 PNG" in lines[i]
+    assert "ошибка чтения" in lines[5]
+
+    assert len(preview_pairs(pairs, limit=2)) == 2
+
+    warns = probe_conversion_warnings(pairs)
+    assert warns[:5] == [f"new{i}.jpg: будет JPEG (OLD был PNG)" for i in range(5)]
+    assert "ошибка чтения" in warns[5]
+
+
+def test_read_header_matches_pillow(tmp_path: Path) -> None:
+    """Проверяет, что быстрый разбор заголовка совпадает с Pillow."""
+    cases = [
+        ("rgb.jpg", "RGB", "JPEG"),
+        ("l.jpg", "L", "JPEG"),
+        ("cmyk.jpg", "CMYK", "JPEG"),
+        ("rgb.png", "RGB", "PNG"),
+        ("rgba.png", "RGBA", "PNG"),
+        ("la.png", "LA", "PNG"),
+        ("p.png", "P", "PNG"),
+    ]
+    for name, mode, fmt in cases:
+        path = tmp_path / name
+        # EXIF-сегмент перед SOF, как в скриншотах Steam
+        extra = {"exif": b"Exif\0\0" + b"\0" * 512} if fmt == "JPEG" else {}
+        Image.new(mode, (17, 9)).save(path, format=fmt, **extra)
+        with path.open("rb") as f:
+            header = _read_header(f)
+        with Image.open(path) as im:
+            assert header == (im.format, im.width, im.height, im.mode), name
+
+
+def test_read_header_unknown_format(tmp_path: Path) -> None:
+    """Проверяет, что нераспознанные файлы уходят в Pillow."""
+    path = tmp_path / "img.bmp"
+    _make_img(path, fmt="BMP")
+    with path.open("rb") as f:
+        assert _read_header(f) is None
+    assert get_image_info(path).fmt == "BMP"
+
+
+def test_get_image_info_large_exif_falls_back(tmp_path: Path) -> None:
+    """Проверяет JPEG, у которого SOF не попадает в прочитанный префикс заголовка."""
+    path = tmp_path / "big_exif.jpg"
+    Image.new("RGB", (21, 13)).save(path, format="JPEG", exif=b"Exif\0\0" + b"\0" * 60_000)
+
+    info = get_image_info(path)
+    assert (info.width, info.height, info.fmt, info.mode) == (21, 13, "JPEG", "RGB")
+
+
+def test_probe_pairs_cache_shared(tmp_path: Path, monkeypatch) -> None:
+    """Проверяет, что preview/probe используют кэш probe_pairs без повторного чтения."""
+    old = tmp_path / "old.png"
+    new = tmp_path / "new.jpg"
+    _make_img(old, size=(10, 12), fmt="PNG")
+    _make_img(new, fmt="JPEG")
+    pairs = [Pair(old=old, new=new)]
+
+    cache = probe_pairs(pairs)
+    assert set(cache) == {old, new}
+
+    def _fail(paths):
+        raise AssertionError(f"повторное чтение: {paths}")
+
+    monkeypatch.setattr(mapping, "_image_infos", _fail)
+    assert "OLD: 10x12 PNG" in preview_pairs(pairs, cache=cache)[0]
+    assert probe_conversion_warnings(pairs, cache=cache) == ["new.jpg: будет JPEG (OLD был PNG)"]
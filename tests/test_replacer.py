@@ -1,8 +1,14 @@
+import errno
 import hashlib
+import os
+import sys
+import time
+import types
 from pathlib import Path
 from PIL import Image
 
-from core.replacer import replace_one, replace_many
+from core import replacer
+from core.replacer import _prepare_for_save, _sniff_format, iter_replace_threaded, replace_many, replace_one
 
 
 def _mk_img(path: Path, size=(16, 12), color=(200, 100, 50), fmt="JPEG") -> None:
@@ -18,6 +24,28 @@ def _mk_img(path: Path, size=(16, 12), color=(200, 100, 50), fmt="JPEG") -> None
     img.save(path, format=fmt)
 
 
+def _mk_pairs(tmp_path: Path, n: int, old_fmts=("PNG",)) -> list[tuple[Path, Path]]:
+    """Создаёт n пар (old, new) для пакетной замены.
+
+    Args:
+        tmp_path: Каталог для файлов.
+        n: Число пар.
+        old_fmts: Форматы OLD-файлов по кругу; OLD номер i имеет размер (10 + i, 10).
+
+    Returns:
+        list[tuple[Path, Path]]: Пары (old, new); все NEW — JPEG 5x5.
+    """
+    pairs = []
+    for i in range(n):
+        old_fmt = old_fmts[i % len(old_fmts)]
+        old = tmp_path / f"old{i}{'.png' if old_fmt == 'PNG' else '.jpg'}"
+        new = tmp_path / f"new{i}.jpg"
+        _mk_img(old, size=(10 + i, 10), fmt=old_fmt)
+        _mk_img(new, size=(5, 5), fmt="JPEG")
+        pairs.append((old, new))
+    return pairs
+
+
 def _md5(path: Path) -> str:
     """Вычисляет MD5-хеш файла.
 
@@ -91,3 +119,331 @@ def test_replace_many_dry_run(tmp_path: Path) -> None:
     assert all(r.ok and r.action == "dry-run" for r in res)
     assert new1.stat().st_size > 0
     assert new2.stat().st_size > 0
+
+
+def test_replace_many_parallel_mixed(tmp_path: Path) -> None:
+    """Проверяет копирования в пуле потоков и перекодировки в пуле процессов с сохранением порядка."""
+    pairs = _mk_pairs(tmp_path, 6, old_fmts=("JPEG", "PNG"))
+
+    res = replace_many(pairs, max_workers=2, processes=True)
+
+    assert [(r.old, r.new) for r in res] == pairs
+    assert all(r.ok for r in res)
+    assert [r.action for r in res] == ["copy-bytes", "reencode->JPEG"] * 3
+    for i, (_, new) in enumerate(pairs):
+        with Image.open(new) as im:
+            assert im.size == (10 + i, 10)
+
+
+def test_sniff_format(tmp_path: Path) -> None:
+    """Проверяет определение формата по сигнатуре файла и фолбэк на Pillow."""
+    jpg, png, bmp = tmp_path / "a.jpg", tmp_path / "b.jpg", tmp_path / "c.png"
+    _mk_img(jpg, fmt="JPEG")
+    _mk_img(png, fmt="PNG")
+    _mk_img(bmp, fmt="BMP")
+
+    assert _sniff_format(jpg) == "JPEG"
+    assert _sniff_format(png) == "PNG"
+    assert _sniff_format(bmp) == "BMP"
+    (tmp_path / "junk.png").write_bytes(b"not an image")
+    assert _sniff_format(tmp_path / "junk.png") is None
+    assert _sniff_format(tmp_path / "missing.jpg") is None
+
+
+def test_replace_one_sizes_and_missing(tmp_path: Path) -> None:
+    """Проверяет размеры до/после и ошибки для отсутствующих файлов."""
+    old = tmp_path / "old.jpg"
+    new = tmp_path / "new.jpg"
+    _mk_img(old, size=(32, 32), fmt="JPEG")
+    _mk_img(new, size=(4, 4), fmt="JPEG")
+    before = new.stat().st_size
+
+    res = replace_one(old, new)
+    assert res.action == "copy-bytes"
+    assert res.bytes_before == before
+    assert res.bytes_after == old.stat().st_size == new.stat().st_size
+
+    missing_old = replace_one(tmp_path / "nope.jpg", new)
+    assert not missing_old.ok and missing_old.error == "OLD не найден"
+    missing_new = replace_one(old, tmp_path / "nope.jpg")
+    assert not missing_new.ok and missing_new.error == "NEW не найден"
+    assert missing_new.bytes_before == 0
+
+
+def test_copy_raw(tmp_path: Path, monkeypatch) -> None:
+    """Проверяет побайтовое копирование через os.read/os.write."""
+    monkeypatch.setattr(replacer, "_COPY_CHUNK", 1000)  # несколько итераций цикла
+
+    src = tmp_path / "src.bin"
+    dst = tmp_path / "dst.bin"
+    src.write_bytes(bytes(range(256)) * 1000)
+    dst.write_bytes(b"old content that is longer than nothing")
+
+    replacer._copy_raw(src, dst)
+    assert dst.read_bytes() == src.read_bytes()
+    # Буфер потока переиспользуется между файлами
+    assert replacer._copy_buffer() is replacer._copy_buffer()
+
+
+def test_copy_raw_kernel_fallbacks(tmp_path: Path, monkeypatch) -> None:
+    """Проверяет переход copy_file_range -> sendfile -> os.read/os.write."""
+    def _unsupported(*args):
+        raise OSError(errno.EXDEV, "cross-device")
+
+    src = tmp_path / "src.bin"
+    src.write_bytes(bytes(range(256)) * 1000)
+
+    monkeypatch.setattr(os, "copy_file_range", _unsupported, raising=False)
+    monkeypatch.delattr(replacer._copy_tls, "buf", raising=False)
+    replacer._copy_raw(src, tmp_path / "a.bin")
+    assert (tmp_path / "a.bin").read_bytes() == src.read_bytes()
+    if hasattr(os, "sendfile"):
+        # Ядро скопировало весь файл — буфер для os.read/os.write не выделялся
+        assert not hasattr(replacer._copy_tls, "buf")
+
+    monkeypatch.setattr(os, "sendfile", _unsupported, raising=False)
+    replacer._copy_raw(src, tmp_path / "b.bin")
+    assert (tmp_path / "b.bin").read_bytes() == src.read_bytes()
+
+
+def test_replace_one_encode_speed(tmp_path: Path) -> None:
+    """Проверяет, что режимы encode_speed дают корректный PNG."""
+    old = tmp_path / "old.jpg"
+    _mk_img(old, size=(64, 48), fmt="JPEG")
+
+    for speed in ("fast", "balanced", "small", "png-small"):
+        new = tmp_path / f"new_{speed}.png"
+        _mk_img(new, fmt="PNG")
+        res = replace_one(old, new, encode_speed=speed)
+        assert res.ok and res.action == "reencode->PNG"
+        with Image.open(new) as im:
+            assert im.format == "PNG"
+            assert im.size == (64, 48)
+
+
+def test_replace_one_force_jpg_on_jpeg_is_lossless(tmp_path: Path) -> None:
+    """Проверяет lossless-переписывание JPEG → JPEG с удалением метаданных."""
+    old = tmp_path / "old.jpg"
+    new = tmp_path / "new.jpg"
+    img = Image.new("RGB", (24, 16))
+    img.putpixel((3, 4), (250, 10, 10))
+    img.save(old, format="JPEG", exif=b"Exif\0\0" + b"\0" * 128)
+    _mk_img(new, fmt="JPEG")
+
+    res = replace_one(old, new, force_format="jpg")
+
+    assert res.ok and res.action == "jpeg-transform"
+    assert res.bytes_after == new.stat().st_size < old.stat().st_size
+    with Image.open(old) as a, Image.open(new) as b:
+        assert "exif" not in b.info
+        assert list(a.getdata()) == list(b.getdata())
+
+
+def test_replace_many_pipeline(tmp_path: Path) -> None:
+    """Проверяет конвейер декодирования/кодирования (max_workers=1)."""
+    pairs = _mk_pairs(tmp_path, 5, old_fmts=("JPEG", "PNG"))
+    pairs.append((tmp_path / "missing.png", tmp_path / "new0.jpg"))
+
+    res = replace_many(pairs, max_workers=1)
+
+    assert [r.action for r in res[:5]] == ["copy-bytes", "reencode->JPEG"] * 2 + ["copy-bytes"]
+    assert all(r.ok for r in res[:5])
+    assert not res[5].ok and res[5].error == "OLD не найден"
+    for i, (_, new) in enumerate(pairs[:5]):
+        with Image.open(new) as im:
+            assert im.size == (10 + i, 10)
+
+
+def test_replace_many_threaded(tmp_path: Path) -> None:
+    """Проверяет замену в пуле потоков: порядок списка и полноту итератора."""
+    pairs = _mk_pairs(tmp_path, 4)
+
+    res = replace_many(pairs, max_workers=2)
+    assert [r.new for r in res] == [n for _, n in pairs]
+    assert all(r.ok and r.action == "reencode->JPEG" for r in res)
+
+    dry = list(iter_replace_threaded(pairs, dry_run=True, max_workers=2))
+    assert sorted(r.new for r in dry) == sorted(n for _, n in pairs)
+    assert replace_many([]) == [] and list(iter_replace_threaded([])) == []
+
+
+def test_replace_one_target_size(tmp_path: Path) -> None:
+    """Проверяет уменьшение до target_size (для JPEG — через draft при декодировании)."""
+    old = tmp_path / "old.jpg"
+    new = tmp_path / "new.jpg"
+    _mk_img(old, size=(640, 480), fmt="JPEG")
+    _mk_img(new, fmt="JPEG")
+
+    res = replace_one(old, new, target_size=(100, 100))
+
+    assert res.ok and res.action == "reencode->JPEG"
+    with Image.open(new) as im:
+        assert im.size == (100, 75)
+
+
+def test_prepare_for_save_png_modes() -> None:
+    """Проверяет, что P/LA без прозрачности не превращаются в RGBA."""
+    pal = Image.new("P", (4, 4))
+    assert _prepare_for_save(pal, "PNG").mode == "RGB"
+    pal.info["transparency"] = 0
+    assert _prepare_for_save(pal, "PNG").mode == "RGBA"
+
+    assert _prepare_for_save(Image.new("LA", (4, 4), (10, 255)), "PNG").mode == "L"
+    assert _prepare_for_save(Image.new("LA", (4, 4), (10, 128)), "PNG").mode == "RGBA"
+
+
+def test_replace_with_known_src_fmt(tmp_path: Path, monkeypatch) -> None:
+    """Проверяет, что известный формат OLD избавляет от повторного чтения сигнатуры."""
+    old = tmp_path / "old.png"
+    new = tmp_path / "new.jpg"
+    _mk_img(old, size=(12, 12), fmt="PNG")
+    _mk_img(new, fmt="JPEG")
+
+    def _no_sniff(path: Path) -> None:
+        raise AssertionError("сигнатура не должна читаться")
+
+    monkeypatch.setattr(replacer, "_sniff_format", _no_sniff)
+    res = replacer.replace_many([(old, new)], src_fmts={old: "PNG"})
+
+    assert res[0].ok and res[0].action == "reencode->JPEG"
+
+    # Конвейер (max_workers=1) тоже берёт форматы из src_fmts
+    (tmp_path / "pipe").mkdir()
+    pairs = _mk_pairs(tmp_path / "pipe", 2, old_fmts=("JPEG", "PNG"))
+    fmts = {old_p: "PNG" if old_p.suffix == ".png" else "JPEG" for old_p, _ in pairs}
+    res = replacer.replace_many(pairs, max_workers=1, src_fmts=fmts)
+
+    assert [r.action for r in res] == ["copy-bytes", "reencode->JPEG"]
+
+
+def test_replace_one_skip_identical(tmp_path: Path) -> None:
+    """Проверяет, что повторная замена тем же содержимым ничего не пишет."""
+    old = tmp_path / "old.jpg"
+    new = tmp_path / "new.jpg"
+    _mk_img(old, size=(16, 16), fmt="JPEG")
+    _mk_img(new, fmt="JPEG")
+
+    assert replace_one(old, new).action == "copy-bytes"
+    mtime = new.stat().st_mtime_ns
+
+    res = replace_one(old, new)
+    assert res.ok and res.action == "skip-identical"
+    assert res.bytes_before == res.bytes_after == old.stat().st_size
+    assert new.stat().st_mtime_ns == mtime
+
+    assert replace_one(old, new, force_format="png").action == "reencode->PNG"
+
+    # PNG в .jpg с теми же байтами — не «совпадает», а требует перекодировки
+    png_old, png_new = tmp_path / "old.png", tmp_path / "same.jpg"
+    _mk_img(png_old, fmt="PNG")
+    png_new.write_bytes(png_old.read_bytes())
+    assert replace_one(png_old, png_new).action == "reencode->JPEG"
+
+
+def test_replace_one_pyvips_backend(tmp_path: Path, monkeypatch) -> None:
+    """Проверяет перекодировку через pyvips (USE_PYVIPS=1) на заглушке модуля."""
+    calls = []
+
+    class _StubImage:
+        def __init__(self, path: str) -> None:
+            self._path = path
+
+        @classmethod
+        def new_from_file(cls, path: str, **kw) -> "_StubImage":
+            return cls(path)
+
+        def jpegsave(self, path: str, **kw) -> None:
+            calls.append(("jpegsave", kw))
+            with Image.open(self._path) as im:
+                im.convert("RGB").save(path, format="JPEG")
+
+        def pngsave(self, path: str, **kw) -> None:
+            calls.append(("pngsave", kw))
+            with Image.open(self._path) as im:
+                im.save(path, format="PNG")
+
+    monkeypatch.setitem(sys.modules, "pyvips", types.SimpleNamespace(Image=_StubImage))
+    monkeypatch.setenv("USE_PYVIPS", "1")
+
+    old = tmp_path / "old.png"
+    _mk_img(old, size=(12, 10), fmt="PNG")
+    new_jpg, new_png = tmp_path / "new.jpg", tmp_path / "new.png"
+    _mk_img(new_jpg, fmt="JPEG")
+    old_jpg = tmp_path / "old.jpg"
+    _mk_img(old_jpg, size=(12, 10), fmt="JPEG")
+    _mk_img(new_png, fmt="PNG")
+
+    assert replace_one(old, new_jpg, encode_speed="small").action == "reencode->JPEG"
+    assert replace_one(old_jpg, new_png).action == "reencode->PNG"
+
+    assert calls == [
+        ("jpegsave", {"Q": 95, "optimize_coding": True, "strip": True}),
+        ("pngsave", {"compression": 1, "strip": True}),
+    ]
+    with Image.open(new_jpg) as a, Image.open(new_png) as b:
+        assert (a.format, a.size) == ("JPEG", (12, 10))
+        assert (b.format, b.size) == ("PNG", (12, 10))
+
+
+def test_replace_one_mislabeled_old(tmp_path: Path) -> None:
+    """Проверяет, что PNG с расширением .jpg перекодируется, а не копируется в .jpg."""
+    old = tmp_path / "old.jpg"
+    new = tmp_path / "new.jpg"
+    _mk_img(old, size=(9, 7), fmt="PNG")
+    _mk_img(new, fmt="JPEG")
+
+    res = replace_one(old, new)
+
+    assert res.ok and res.action == "reencode->JPEG"
+    with Image.open(new) as im:
+        assert (im.format, im.size) == ("JPEG", (9, 7))
+
+
+def test_replace_one_force_jpg_on_cmyk_reencodes(tmp_path: Path) -> None:
+    """Проверяет, что CMYK JPEG не идёт lossless-путём, а перекодируется в RGB."""
+    old = tmp_path / "old.jpg"
+    new = tmp_path / "new.jpg"
+    Image.new("CMYK", (10, 8), (0, 200, 200, 0)).save(old, format="JPEG")
+    _mk_img(new, fmt="JPEG")
+
+    res = replace_one(old, new, force_format="jpg")
+
+    assert res.ok and res.action == "reencode->JPEG"
+    with Image.open(new) as im:
+        assert (im.format, im.mode, im.size) == ("JPEG", "RGB", (10, 8))
+
+
+def test_iter_replace_threaded_close_cancels(tmp_path: Path, monkeypatch) -> None:
+    """Проверяет, что закрытие итератора отменяет ещё не начатые пары."""
+    started = []
+
+    def _slow_one(old_p: Path, new_p: Path, **kw) -> replacer.ReplaceResult:
+        started.append(old_p)
+        if len(started) > 1:
+            time.sleep(0.05)  # следующая пара ещё в работе, когда итератор закрывают
+        return replacer.ReplaceResult(old_p, new_p, "copy-bytes", 0, 0, True)
+
+    monkeypatch.setattr(replacer, "replace_one", _slow_one)
+    pairs = [(tmp_path / f"o{i}.png", tmp_path / f"n{i}.jpg") for i in range(20)]
+
+    results = iter_replace_threaded(pairs, max_workers=1)
+    first = next(results)
+    results.close()
+
+    assert first.old == pairs[0][0]
+    # Один поток: готова первая пара и, возможно, та, что успела начаться
+    assert 1 <= len(started) <= 2
+
+
+def test_replace_one_png_small_keeps_jpeg_fast(tmp_path: Path) -> None:
+    """Проверяет, что "png-small" не меняет кодирование JPEG относительно "fast"."""
+    old = tmp_path / "old.png"
+    _mk_img(old, size=(40, 30), fmt="PNG")
+    out = {}
+    for speed in ("fast", "png-small"):
+        new = tmp_path / f"new_{speed}.jpg"
+        _mk_img(new, fmt="JPEG")
+        assert replace_one(old, new, encode_speed=speed).action == "reencode->JPEG"
+        out[speed] = new.read_bytes()
+
+    assert out["fast"] == out["png-small"]
@@ -1,6 +1,9 @@
 from pathlib import Path
 
+import pytest
+
 from core import scanner
+from core.mapping import build_pairs
 
 
 def test_list_images_raw(tmp_path: Path) -> None:
@@ -17,6 +20,24 @@ def test_list_images_raw(tmp_path: Path) -> None:
     assert "note.txt" not in names
 
 
+def test_list_images_raw_skips_non_files(tmp_path: Path) -> None:
+    """Проверяет регистр расширения и пропуск каталогов, файлов без точки и симлинков."""
+    (tmp_path / "img1.jpg").write_text("a")
+    (tmp_path / "img3.PNG").write_text("d")
+    (tmp_path / "jpg").write_text("e")
+    (tmp_path / "dir.jpg").mkdir()
+    try:
+        (tmp_path / "link.jpg").symlink_to(tmp_path / "img1.jpg")
+    except OSError:
+        pytest.skip("нет прав на создание симлинков")
+
+    files = scanner.list_images_raw(tmp_path)
+    names = sorted(f.name for f in files)
+
+    assert names == ["img1.jpg", "img3.PNG"]
+    assert all(isinstance(f, Path) and f.parent == tmp_path for f in files)
+
+
 def test_scan_old_new(tmp_path: Path) -> None:
     """Проверяет сканирование папок OLD и NEW и возврат списков файлов."""
     old_dir = tmp_path / "old"
@@ -34,3 +55,27 @@ def test_scan_old_new(tmp_path: Path) -> None:
     assert len(old) == 2
     assert len(new) == 2
     assert warnings == []
+
+
+def test_scan_old_new_entries(tmp_path: Path) -> None:
+    """Проверяет, что FileEntry несут размер и mtime и попадают в пары."""
+    old_dir = tmp_path / "old"
+    new_dir = tmp_path / "new"
+    old_dir.mkdir()
+    new_dir.mkdir()
+
+    (old_dir / "a.jpg").write_text("12345")
+    (old_dir / "note.txt").write_text("x")
+    (new_dir / "x.JPG").write_text("3")
+
+    old, new, warnings = scanner.scan_old_new_entries(old_dir, new_dir)
+
+    assert [e.name for e in old] == ["a.jpg"]
+    assert [e.name for e in new] == ["x.JPG"]
+    assert old[0].size == 5
+    assert old[0].mtime_ns == (old_dir / "a.jpg").stat().st_mtime_ns
+    assert warnings == []
+
+    pairs, _ = build_pairs(old, new)
+    assert pairs[0].old == old_dir / "a.jpg"
+    assert pairs[0].old_entry == old[0]
@@ -1,8 +1,15 @@
 from __future__ import annotations
 
+import math
+import os
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
 
-from PySide6.QtCore import Qt, QTimer
+from PySide6.QtCore import Qt, QThread, QTimer
 from PySide6.QtWidgets import (
     QWidget,
     QVBoxLayout,
@@ -19,10 +26,39 @@ from PySide6.QtWidgets import (
     QProgressBar,
 )
 
-from core.scanner import scan_old_new
-from core.mapping import build_pairs, get_image_info
-from core.replacer import replace_many
+from core.scanner import scan_old_new_entries
+from core.mapping import ImageInfo, Pair, build_pairs, get_image_info
+from core.replacer import ReplaceResult
 from core.autoscreen import AutoScreener, AutoScreenError
+from ui.replace_worker import ReplaceWorker
+
+# Сколько времени за один заход event loop выводим строки предпросмотра (~1 кадр при 60 Гц)
+_PREVIEW_SLICE_S = 0.016
+# Через сколько заглянуть снова, если заголовки следующей пары ещё читаются
+_PREVIEW_WAIT_MS = 5
+
+# Максимум строк (блоков) в логе: более старые удаляются
+_LOG_MAX_BLOCKS = 5000
+
+# Период обновления обратного отсчёта автоскрина
+_AUTOS_COUNTDOWN_MS = 100
+
+# HTML-шаблоны лога: неизменная часть строк собирается один раз
+_BADGE_TPL = (
+    '<span style="display:inline-block;padding:1px 6px;'
+    "border-radius:6px;background:{color};color:#fff;"
+    'font:11px/1.4 monospace;">{text}</span>'
+)
+_MONO_OPEN = '<span style="font-family:ui-monospace,Consolas,monospace">'
+_MONO_CLOSE = "</span>"
+_OK_BADGE = _BADGE_TPL.format(color="#2e7d32", text="OK")
+_ERR_BADGE = _BADGE_TPL.format(color="#c62828", text="ERR")
+
+
+@lru_cache(maxsize=64)
+def _fmt_wh(width: int, height: int) -> str:
+    """Строка размера "ШxВ"; у скриншотов обычно одно-два разрешения на всю папку."""
+    return f"{width}x{height}"
 
 
 class MainWindow(QWidget):
@@ -35,10 +71,12 @@ class MainWindow(QWidget):
 
         # --------------------------- Paths ---------------------------
         self.old_edit = QLineEdit()
+        self.old_edit.textChanged.connect(self._on_old_text_changed)
         self.old_btn = QPushButton("Выбрать OLD…")
         self.old_btn.clicked.connect(self.choose_old)
 
         self.new_edit = QLineEdit()
+        self.new_edit.textChanged.connect(self._on_new_text_changed)
         self.new_btn = QPushButton("Выбрать NEW…")
         self.new_btn.clicked.connect(self.choose_new)
 
@@ -58,6 +96,9 @@ class MainWindow(QWidget):
         self.dry_chk = QCheckBox("Dry-run")
         self.dry_chk.setChecked(True)
 
+        # По умолчанию PNG пишется с compress_level=1: файл больше, но кодирование в разы быстрее
+        self.png_max_chk = QCheckBox("Максимальное сжатие PNG (медленно)")
+
         self.format_combo = QComboBox()
         self.format_combo.addItems(["auto", "jpg", "png"])
 
@@ -72,6 +113,7 @@ class MainWindow(QWidget):
         opts_layout.addWidget(QLabel("Предпросмотр (строк):"))
         opts_layout.addWidget(self.limit_spin)
         opts_layout.addStretch()
+        opts_layout.addWidget(self.png_max_chk)
         opts_layout.addWidget(self.dry_chk)
 
         # --------------------------- Actions ---------------------------
@@ -88,44 +130,12 @@ class MainWindow(QWidget):
         actions_layout.addStretch()
 
         # --------------------------- AutoScreen ---------------------------
-        self.autoscreen_count = QSpinBox()
-        self.autoscreen_count.setRange(1, 100_000)
-        self.autoscreen_count.setValue(10)
-
-        self.autoscreen_interval = QSpinBox()
-        self.autoscreen_interval.setRange(1, 3600)
-        self.autoscreen_interval.setValue(2)
-        self.autoscreen_interval.setSuffix(" сек")
-
-        self.autoscreen_delay = QSpinBox()
-        self.autoscreen_delay.setRange(0, 3600)
-        self.autoscreen_delay.setValue(5)
-        self.autoscreen_delay.setSuffix(" сек")
-
-        self.autoscreen_status = QLabel("Автоскрин: не запущен")
-        self.autoscreen_start_btn = QPushButton("Старт F12")
-        self.autoscreen_stop_btn = QPushButton("Стоп")
-        self.autoscreen_stop_btn.setEnabled(False)
-
-        self.autoscreen_start_btn.clicked.connect(self.on_autoscreen_start)
-        self.autoscreen_stop_btn.clicked.connect(self.on_autoscreen_stop)
-
-        autos_layout = QHBoxLayout()
-        autos_layout.addWidget(QLabel("Автоскрин (F12):"))
-        autos_layout.addSpacing(8)
-        autos_layout.addWidget(QLabel("Кол-во:"))
-        autos_layout.addWidget(self.autoscreen_count)
-        autos_layout.addSpacing(8)
-        autos_layout.addWidget(QLabel("Интервал:"))
-        autos_layout.addWidget(self.autoscreen_interval)
-        autos_layout.addSpacing(8)
-        autos_layout.addWidget(QLabel("Задержка старта:"))
-        autos_layout.addWidget(self.autoscreen_delay)
-        autos_layout.addSpacing(8)
-        autos_layout.addWidget(self.autoscreen_start_btn)
-        autos_layout.addWidget(self.autoscreen_stop_btn)
-        autos_layout.addStretch()
-        autos_layout.addWidget(self.autoscreen_status)
+        # Виджеты автоскрина создаются при первом открытии панели (_build_autoscreen):
+        # большинству запусков нужны только предпросмотр и замена
+        self.autoscreen_show_btn = QPushButton("Показать автоскрин")
+        self.autoscreen_show_btn.clicked.connect(self._build_autoscreen)
+        self._autos_layout = QHBoxLayout()
+        self._autos_layout.addWidget(self.autoscreen_show_btn, 0, Qt.AlignLeft)
 
         # --------------------------- Progress & Log ---------------------------
         self.progress = QProgressBar()
@@ -134,26 +144,58 @@ class MainWindow(QWidget):
 
         self.log = QTextEdit()
         self.log.setReadOnly(True)
+        # Лог только дописывается: история undo не нужна, а старые строки отбрасываются,
+        # чтобы длинные прогоны не раздували документ и его перекладку
+        self.log.document().setUndoRedoEnabled(False)
+        self.log.document().setMaximumBlockCount(_LOG_MAX_BLOCKS)
 
         # --------------------------- Root layout ---------------------------
         root = QVBoxLayout(self)
         root.addLayout(paths_layout)
         root.addLayout(opts_layout)
         root.addLayout(actions_layout)
-        root.addLayout(autos_layout)
+        root.addLayout(self._autos_layout)
         root.addWidget(self.progress)
         root.addWidget(QLabel("Лог:"))
         root.addWidget(self.log, 1)
 
         # --------------------------- State ---------------------------
+        # Проверенные папки из полей ввода (обновляются по textChanged); None — папки нет
         self._old_dir: Path | None = None
         self._new_dir: Path | None = None
         self._replace_queue: list[tuple[Path, Path]] = []
-        self._replace_index = 0
+        # Форматы OLD-файлов, уже прочитанные в предпросмотре: замена не читает их повторно
+        self._src_fmts: dict[Path, str] = {}
+        # Пул для чтения заголовков в предпросмотре (упор в диск, GIL отпускается)
+        self._io_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="sr-io")
+        # Состояние идущего предпросмотра: пары, задачи чтения (OLD, NEW) и итоги для вывода в конце
+        self._preview_pairs: list[Pair] = []
+        self._preview_futs: list[tuple[Future[ImageInfo], Future[ImageInfo]]] = []
+        self._preview_index = 0
+        self._preview_src_fmts: dict[Path, str] = {}
+        self._preview_footer: tuple[list[str], int, int] = ([], 0, 0)
+        # Поток и воркер текущей замены; None — замена не идёт
+        self._replace_thread: QThread | None = None
+        self._replace_worker: ReplaceWorker | None = None
+        # Сколько пар обработано в текущей замене (по сигналу progressed)
+        self._replace_done = 0
+        # Последнее выставленное значение прогресса (в процентах)
+        self._last_pct = 0
+
+        # Буфер лога: строки копятся и выводятся одним append раз в 50 мс,
+        # иначе каждая строка — отдельная перекладка документа QTextEdit
+        self._log_buf: deque[str] = deque()
+        self._log_timer = QTimer(self)
+        self._log_timer.setSingleShot(True)
+        self._log_timer.setInterval(50)
+        self._log_timer.timeout.connect(self._log_flush)
 
         # AutoScreen state
+        # Одноразовый таймер: каждый тик сам планирует следующий — 10 раз/сек только
+        # на обратном отсчёте, во время съёмки — ровно к следующему нажатию
         self._autos_timer = QTimer(self)
-        self._autos_timer.setInterval(100)  # 10 тиков/сек
+        self._autos_timer.setSingleShot(True)
+        self._autos_timer.setTimerType(Qt.PreciseTimer)
         self._autos_timer.timeout.connect(self._autos_tick)
         self._autos_runner: AutoScreener | None = None
         self._autos_prev_remaining: int | None = None
@@ -163,21 +205,35 @@ class MainWindow(QWidget):
 
     def _log_clear(self) -> None:
         """Очищает лог и включает поддержку HTML."""
+        self._log_buf.clear()
+        self._log_timer.stop()
         self.log.clear()
         self.log.setAcceptRichText(True)
 
     def _log_html(self, html: str) -> None:
-        """Добавляет HTML-строку в лог."""
-        self.log.append(html)
+        """Добавляет HTML-строку в буфер лога; вывод — в _log_flush."""
+        self._log_buf.append(html)
+        if not self._log_timer.isActive():
+            self._log_timer.start()
+
+    def _log_flush(self) -> None:
+        """Выводит накопленные строки лога одним append (по таймеру или в конце операции)."""
+        self._log_timer.stop()
+        if not self._log_buf:
+            return
+        self.log.append("".join(self._log_buf))
+        self._log_buf.clear()
         self.log.ensureCursorVisible()
 
+    def _set_progress(self, pct: int) -> None:
+        """Обновляет прогресс-бар, только если значение изменилось."""
+        if pct != self._last_pct:
+            self.progress.setValue(pct)
+            self._last_pct = pct
+
     def _badge(self, text: str, color: str) -> str:
         """Рисует компактный цветной бейдж (HTML)."""
-        return (
-            '<span style="display:inline-block;padding:1px 6px;'
-            f"border-radius:6px;background:{color};color:#fff;"
-            'font:11px/1.4 monospace;">' + text + "</span>"
-        )
+        return _BADGE_TPL.format(color=color, text=text)
 
     def _sep(self) -> None:
         """Горизонтальный разделитель в логе."""
@@ -185,7 +241,7 @@ class MainWindow(QWidget):
 
     def _mono(self, s: str) -> str:
         """Обернуть текст в моноширинный шрифт (HTML)."""
-        return f'<span style="font-family:ui-monospace,Consolas,monospace">{s}</span>'
+        return f"{_MONO_OPEN}{s}{_MONO_CLOSE}"
 
     def _fmt_pair_preview(
         self,
@@ -198,17 +254,24 @@ class MainWindow(QWidget):
         new_fmt: str,
     ) -> str:
         """Строка предпросмотра пары (HTML)."""
-        left = self._mono(f"{idx:>3}.  OLD: {old_name:<32}  {old_wh:<12} {old_fmt:<5}")
-        right = self._mono(f"NEW: {new_name:<32}  {new_wh:<12} {new_fmt:<5}")
-        return f'<div style="margin:2px 0">{left}<br>{right}</div>'
+        return (
+            f'<div style="margin:2px 0">{_MONO_OPEN}'
+            f"{idx:>3}.  OLD: {old_name:<32}  {old_wh:<12} {old_fmt:<5}<br>"
+            f"NEW: {new_name:<32}  {new_wh:<12} {new_fmt:<5}{_MONO_CLOSE}</div>"
+        )
 
     def _fmt_result(self, ok: bool, new_name: str, old_name: str, action: str, err: str | None) -> str:
         """Строка результата замены (HTML)."""
-        badge = self._badge("OK", "#2e7d32") if ok else self._badge("ERR", "#c62828")
-        mid = "&larr;"
-        tail = self._mono(f"({action})") if ok else f'<span style="color:#ffb4a9">{self._mono(err or "unknown error")}</span>'
-        line = f'{badge} {self._mono(new_name)} {mid} {self._mono(old_name)}  {tail}'
-        return f'<div style="margin:2px 0">{line}</div>'
+        if ok:
+            return (
+                f'<div style="margin:2px 0">{_OK_BADGE} {_MONO_OPEN}{new_name}{_MONO_CLOSE} &larr; '
+                f"{_MONO_OPEN}{old_name}{_MONO_CLOSE}  {_MONO_OPEN}({action}){_MONO_CLOSE}</div>"
+            )
+        return (
+            f'<div style="margin:2px 0">{_ERR_BADGE} {_MONO_OPEN}{new_name}{_MONO_CLOSE} &larr; '
+            f"{_MONO_OPEN}{old_name}{_MONO_CLOSE}  "
+            f'<span style="color:#ffb4a9">{_MONO_OPEN}{err or "unknown error"}{_MONO_CLOSE}</span></div>'
+        )
 
     # --------------------------- Path helpers ---------------------------
 
@@ -217,26 +280,36 @@ class MainWindow(QWidget):
         d = QFileDialog.getExistingDirectory(self, "Выбери папку OLD")
         if d:
             self.old_edit.setText(d)
-            self._old_dir = Path(d)
 
     def choose_new(self) -> None:
         """Открывает диалог выбора папки NEW (screenshots)."""
         d = QFileDialog.getExistingDirectory(self, "Выбери папку NEW (screenshots)")
         if d:
             self.new_edit.setText(d)
-            self._new_dir = Path(d)
+
+    @staticmethod
+    def _dir_from_text(text: str) -> Path | None:
+        """Возвращает путь из поля ввода, если это существующая папка."""
+        s = text.strip().strip('"')
+        return Path(s) if s and os.path.isdir(s) else None
+
+    def _on_old_text_changed(self, text: str) -> None:
+        """Проверяет папку OLD при изменении поля ввода."""
+        self._old_dir = self._dir_from_text(text)
+
+    def _on_new_text_changed(self, text: str) -> None:
+        """Проверяет папку NEW при изменении поля ввода."""
+        self._new_dir = self._dir_from_text(text)
 
     def _get_paths(self) -> tuple[Path, Path] | None:
         """Возвращает выбранные пути OLD/NEW или None с показом ошибки."""
-        old = self._old_dir or Path(self.old_edit.text().strip('"'))
-        new = self._new_dir or Path(self.new_edit.text().strip('"'))
-        if not old.is_dir():
+        if self._old_dir is None:
             QMessageBox.warning(self, "Ошибка", "Папка OLD не найдена.")
             return None
-        if not new.is_dir():
+        if self._new_dir is None:
             QMessageBox.warning(self, "Ошибка", "Папка NEW не найдена.")
             return None
-        return old, new
+        return self._old_dir, self._new_dir
 
     def _set_busy(self, busy: bool) -> None:
         """Переключает элементы UI в режим занятости."""
@@ -247,6 +320,7 @@ class MainWindow(QWidget):
         self.format_combo.setEnabled(not busy)
         self.limit_spin.setEnabled(not busy)
         self.dry_chk.setEnabled(not busy)
+        self.png_max_chk.setEnabled(not busy)
         self.setCursor(Qt.BusyCursor if busy else Qt.ArrowCursor)
 
     # --------------------------- Preview flow ---------------------------
@@ -261,52 +335,96 @@ class MainWindow(QWidget):
         self._log_html("<h4>▶ Предпросмотр пар</h4>")
         self._sep()
         self._set_busy(True)
-        self.progress.setValue(0)
+        self._set_progress(0)
         try:
-            old_list, new_list, scan_warnings = scan_old_new(old, new)
+            old_list, new_list, scan_warnings = scan_old_new_entries(old, new)
             pairs, map_warnings = build_pairs(old_list, new_list)
-            show_n = min(self.limit_spin.value(), len(pairs))
-            for i in range(show_n):
-                p = pairs[i]
-                try:
-                    oi = get_image_info(p.old)
-                    ni = get_image_info(p.new)
-                    line = self._fmt_pair_preview(
-                        i + 1,
-                        p.old.name,
-                        f"{oi.width}x{oi.height}",
-                        oi.fmt or "?",
-                        p.new.name,
-                        f"{ni.width}x{ni.height}",
-                        ni.fmt or "?",
-                    )
-                except Exception as e:
-                    line = (
-                        f'<div style="color:#ffb74d">'
-                        f'{self._mono(f"{i+1:>3}. {p.new.name} ← {p.old.name}")}'
-                        f" — ошибка чтения: {e}</div>"
-                    )
-                self._log_html(line)
+        except Exception as e:
+            self._log_html(f'<div style="color:#ef9a9a">❌ Ошибка предпросмотра: {e}</div>')
+            self._set_busy(False)
+            return
 
-            self._sep()
-            warns = [*scan_warnings, *map_warnings]
-            if warns:
-                self._log_html("<div><b>⚠ Предупреждения:</b></div>")
-                for w in warns:
-                    self._log_html(f'<div style="color:#ffb74d">• {w}</div>')
+        # Заголовки читаются параллельно, строки выводятся порциями по мере готовности
+        submit = self._io_pool.submit
+        self._preview_pairs = pairs
+        self._preview_futs = [
+            (submit(get_image_info, p.old_entry or p.old), submit(get_image_info, p.new_entry or p.new))
+            for p in pairs[:self.limit_spin.value()]
+        ]
+        self._preview_index = 0
+        self._preview_src_fmts = {}
+        self._preview_footer = ([*scan_warnings, *map_warnings], len(old_list), len(new_list))
+        QTimer.singleShot(0, self._render_preview_chunk)
+
+    def _render_preview_chunk(self) -> None:
+        """Выводит строки предпросмотра в пределах бюджета времени и планирует следующую порцию."""
+        futs = self._preview_futs
+        total = len(futs)
+        i = self._preview_index
+        deadline = time.perf_counter() + _PREVIEW_SLICE_S
+        waiting = False
+        while i < total and time.perf_counter() < deadline:
+            p = self._preview_pairs[i]
+            old_fut, new_fut = futs[i]
+            if not (old_fut.done() and new_fut.done()):
+                # result() заблокировал бы GUI-поток на чтении диска — ждём в event loop
+                waiting = True
+                break
+            try:
+                oi = old_fut.result()
+                ni = new_fut.result()
+                if oi.fmt:
+                    self._preview_src_fmts[p.old] = oi.fmt
+                line = self._fmt_pair_preview(
+                    i + 1,
+                    p.old.name,
+                    _fmt_wh(oi.width, oi.height),
+                    oi.fmt or "?",
+                    p.new.name,
+                    _fmt_wh(ni.width, ni.height),
+                    ni.fmt or "?",
+                )
+            except Exception as e:
+                line = (
+                    f'<div style="color:#ffb74d">'
+                    f'{self._mono(f"{i+1:>3}. {p.new.name} ← {p.old.name}")}'
+                    f" — ошибка чтения: {e}</div>"
+                )
+            self._log_html(line)
+            i += 1
+
+        self._preview_index = i
+        if i < total:
+            self._set_progress(i * 100 // total)
+            QTimer.singleShot(_PREVIEW_WAIT_MS if waiting else 0, self._render_preview_chunk)
+            return
+        self._finish_preview()
 
+    def _finish_preview(self) -> None:
+        """Выводит предупреждения и итоги предпросмотра, готовит очередь замены."""
+        pairs = self._preview_pairs
+        warns, old_n, new_n = self._preview_footer
+
+        self._sep()
+        if warns:
+            # Одним append: каждый вызов QTextEdit.append — отдельная перерисовка
             self._log_html(
-                f'<div style="margin-top:6px">'
-                f'{self._mono(f"Итого пар: {len(pairs)} (OLD={len(old_list)}, NEW={len(new_list)})")}'
-                f"</div>"
+                "<div><b>⚠ Предупреждения:</b></div>"
+                + "".join(f'<div style="color:#ffb74d">• {w}</div>' for w in warns)
             )
-            self._replace_queue = [(p.old, p.new) for p in pairs]
-            self.replace_btn.setEnabled(len(pairs) > 0)
-        except Exception as e:
-            self._log_html(f'<div style="color:#ef9a9a">❌ Ошибка предпросмотра: {e}</div>')
-        finally:
-            self.progress.setValue(0)
-            self._set_busy(False)
+
+        self._log_html(
+            f'<div style="margin-top:6px">'
+            f'{self._mono(f"Итого пар: {len(pairs)} (OLD={old_n}, NEW={new_n})")}'
+            f"</div>"
+        )
+        self._replace_queue = [(p.old, p.new) for p in pairs]
+        self._src_fmts = self._preview_src_fmts
+        self._preview_pairs = []
+        self._preview_futs = []
+        self._log_flush()
+        self._set_progress(0)
+        self._set_busy(False)
 
     # --------------------------- Replace flow ---------------------------
 
@@ -317,6 +435,7 @@ class MainWindow(QWidget):
             return
 
         dry = self.dry_chk.isChecked()
+        encode_speed = "png-small" if self.png_max_chk.isChecked() else "fast"
         ff = self.format_combo.currentText()
         force_format = None if ff == "auto" else ff
 
@@ -328,36 +447,113 @@ class MainWindow(QWidget):
         )
         self._sep()
 
-        self._replace_queue = [(o, n, dry, force_format) for (o, n) in self._replace_queue]
-        self._replace_index = 0
-
+        # Замена идёт в отдельном потоке, UI получает результаты пачками через сигналы
+        self._replace_thread = QThread(self)
+        self._replace_worker = ReplaceWorker(
+            self._replace_queue,
+            dry_run=dry,
+            force_format=force_format,
+            encode_speed=encode_speed,
+            src_fmts=self._src_fmts,
+        )
+        self._replace_worker.moveToThread(self._replace_thread)
+        self._replace_thread.started.connect(self._replace_worker.run)
+        self._replace_worker.progressed.connect(self._on_replace_progress)
+        self._replace_worker.failed.connect(self._on_replace_failed)
+        self._replace_worker.finished.connect(self._on_replace_finished)
+        self._replace_worker.finished.connect(self._replace_thread.quit)
+        self._replace_thread.finished.connect(self._replace_worker.deleteLater)
+        self._replace_thread.finished.connect(self._replace_thread.deleteLater)
+
+        self._replace_done = 0
         self._set_busy(True)
-        self.progress.setValue(0)
-        QTimer.singleShot(0, self._process_next_replace)
+        self._set_progress(0)
+        self._replace_thread.start()
 
-    def _process_next_replace(self) -> None:
-        """Выполняет один шаг пакетной замены и планирует следующий."""
-        total = len(self._replace_queue)
-        if self._replace_index >= total:
-            self._sep()
-            self._log_html(self._mono(f"Готово: {total}/{total}"))
-            self._set_busy(False)
-            return
+    def _on_replace_progress(self, done: int, results: list[ReplaceResult]) -> None:
+        """Выводит пачку результатов замены и обновляет прогресс."""
+        self._log_html(
+            "".join(self._fmt_result(r.ok, r.new.name, r.old.name, r.action, r.error) for r in results)
+        )
+        self._replace_done = done
+        self._set_progress(done * 100 // max(1, len(self._replace_queue)))
 
-        old_p, new_p, dry, force_format = self._replace_queue[self._replace_index]
-        try:
-            res = replace_many([(old_p, new_p)], dry_run=dry, force_format=force_format)[0]
-            html = self._fmt_result(res.ok, new_p.name, old_p.name, res.action, res.error)
-            self._log_html(html)
-        except Exception as e:
-            self._log_html(self._fmt_result(False, new_p.name, old_p.name, "error", str(e)))
+    def _on_replace_failed(self, error: str) -> None:
+        """Сообщает об ошибке, прервавшей замену."""
+        self._log_html(self._fmt_result(False, "—", "—", "error", error))
 
-        self._replace_index += 1
-        self.progress.setValue(int(self._replace_index * 100 / max(1, total)))
-        QTimer.singleShot(0, self._process_next_replace)
+    def _on_replace_finished(self) -> None:
+        """Завершает процесс замены."""
+        total = len(self._replace_queue)
+        self._sep()
+        # Меньше total, если замену прервала ошибка или закрытие окна
+        self._log_html(self._mono(f"Готово: {self._replace_done}/{total}"))
+        self._replace_thread = None
+        self._replace_worker = None
+        self._log_flush()
+        self._set_busy(False)
+
+    def closeEvent(self, event) -> None:
+        """Останавливает замену и пул чтения перед закрытием окна.
+
+        Ждать приходится только пары, которые уже в работе: остальные отменяются,
+        а запись атомарная, так что прерванная замена не портит файлы.
+        """
+        if self._replace_thread is not None:
+            self._replace_worker.stop()
+            self._replace_thread.quit()
+            self._replace_thread.wait()
+        self._io_pool.shutdown(wait=False, cancel_futures=True)
+        super().closeEvent(event)
 
     # --------------------------- AutoScreen ---------------------------
 
+    def _build_autoscreen(self) -> None:
+        """Создаёт виджеты автоскрина вместо кнопки «Показать автоскрин»."""
+        self._autos_layout.removeWidget(self.autoscreen_show_btn)
+        self.autoscreen_show_btn.deleteLater()
+
+        self.autoscreen_count = QSpinBox()
+        self.autoscreen_count.setRange(1, 100_000)
+        self.autoscreen_count.setValue(10)
+
+        self.autoscreen_interval = QSpinBox()
+        self.autoscreen_interval.setRange(1, 3600)
+        self.autoscreen_interval.setValue(2)
+        self.autoscreen_interval.setSuffix(" сек")
+
+        self.autoscreen_delay = QSpinBox()
+        self.autoscreen_delay.setRange(0, 3600)
+        self.autoscreen_delay.setValue(5)
+        self.autoscreen_delay.setSuffix(" сек")
+
+        self.autoscreen_status = QLabel("Автоскрин: не запущен")
+        self.autoscreen_start_btn = QPushButton("Старт F12")
+        self.autoscreen_stop_btn = QPushButton("Стоп")
+        self.autoscreen_stop_btn.setEnabled(False)
+
+        self.autoscreen_start_btn.clicked.connect(self.on_autoscreen_start)
+        self.autoscreen_stop_btn.clicked.connect(self.on_autoscreen_stop)
+
+        autos_layout = QHBoxLayout()
+        autos_layout.addWidget(QLabel("Автоскрин (F12):"))
+        autos_layout.addSpacing(8)
+        autos_layout.addWidget(QLabel("Кол-во:"))
+        autos_layout.addWidget(self.autoscreen_count)
+        autos_layout.addSpacing(8)
+        autos_layout.addWidget(QLabel("Интервал:"))
+        autos_layout.addWidget(self.autoscreen_interval)
+        autos_layout.addSpacing(8)
+        autos_layout.addWidget(QLabel("Задержка старта:"))
+        autos_layout.addWidget(self.autoscreen_delay)
+        autos_layout.addSpacing(8)
+        autos_layout.addWidget(self.autoscreen_start_btn)
+        autos_layout.addWidget(self.autoscreen_stop_btn)
+        autos_layout.addStretch()
+        autos_layout.addWidget(self.autoscreen_status)
+
+        self._autos_layout.insertLayout(0, autos_layout)
+
     def on_autoscreen_start(self) -> None:
         """Запускает режим автоскрина (эмуляция F12)."""
         if self._autos_runner is not None:
@@ -402,7 +598,8 @@ class MainWindow(QWidget):
         self.autoscreen_status.setText(f"Старт через: {int(delay)}s")
         self.autoscreen_start_btn.setEnabled(False)
         self.autoscreen_stop_btn.setEnabled(True)
-        self._autos_timer.start()
+        # Интервал задаём явно: start(ms) в _autos_tick перезаписывает его от прошлого запуска
+        self._autos_timer.start(min(_AUTOS_COUNTDOWN_MS, self._ms_until(delay)))
 
     def on_autoscreen_stop(self) -> None:
         """Останавливает автоскрин."""
@@ -416,6 +613,11 @@ class MainWindow(QWidget):
         self._autos_prev_remaining = None
         self._autos_prev_countdown_sec = None
 
+    @staticmethod
+    def _ms_until(sec: float) -> int:
+        """Задержка таймера (мс, не меньше 1) до события через sec секунд."""
+        return max(1, math.ceil(sec * 1000))
+
     def _autos_tick(self) -> None:
         """Обработчик периодического таймера автоскрина."""
         if self._autos_runner is None:
@@ -450,6 +652,7 @@ class MainWindow(QWidget):
             if self._autos_prev_countdown_sec != left_sec:
                 self.autoscreen_status.setText(f"Старт через: {left_sec}s")
                 self._autos_prev_countdown_sec = left_sec
+            self._autos_timer.start(min(_AUTOS_COUNTDOWN_MS, self._ms_until(sec_to_next)))
             return
 
         # Running: если уменьшилось remaining -> было нажатие F12
@@ -459,16 +662,17 @@ class MainWindow(QWidget):
 
             if remaining < self._autos_prev_remaining:
                 done = self._autos_prev_remaining - remaining
-                from datetime import datetime
-
-                for k in range(done):
-                    idx = self._autos_runner.count - (self._autos_prev_remaining - k) + 1
-                    t = datetime.now().strftime("%H:%M:%S")
-                    self._log_html(self._mono(f"[{t}] [F12] скрин #{idx}"))
+                # Все нажатия за тик — одной строкой лога с общим временем
+                t = datetime.now().strftime("%H:%M:%S")
+                first = self._autos_runner.count - self._autos_prev_remaining + 1
+                self._log_html(
+                    "<br>".join(self._mono(f"[{t}] [F12] скрин #{idx}") for idx in range(first, first + done))
+                )
 
                 self._autos_prev_remaining = remaining
 
             self.autoscreen_status.setText(f"Идёт автоскрин — осталось: {remaining}")
+            self._autos_timer.start(self._ms_until(sec_to_next))
             return
 
         # Завершено/остановлено
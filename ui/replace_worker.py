@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import threading
+from contextlib import closing
+from pathlib import Path
+
+from PySide6.QtCore import QElapsedTimer, QObject, Signal
+
+from core.replacer import EncodeSpeed, ReplaceResult, iter_replace_threaded
+
+# Не чаще одного сигнала прогресса за это время: каждый сигнал — перерисовка лога в UI
+_EMIT_INTERVAL_MS = 50
+
+
+class ReplaceWorker(QObject):
+    """Выполняет пакетную замену вне GUI-потока.
+
+    Объект переносится в отдельный QThread; run() запускается по сигналу started
+    потока. Результаты копятся и отдаются пачками не чаще раза в _EMIT_INTERVAL_MS.
+    stop() можно вызвать из любого потока: ещё не начатые пары отменяются.
+
+    Signals:
+        progressed(int, list): Сколько пар обработано всего и новые результаты
+            (list[ReplaceResult]).
+        failed(str): Замена прервана исключением.
+        finished(): Работа завершена (в том числе после failed).
+    """
+
+    progressed = Signal(int, list)
+    failed = Signal(str)
+    finished = Signal()
+
+    def __init__(
+            self,
+            pairs: list[tuple[Path, Path]],
+            *,
+            dry_run: bool,
+            force_format: str | None,
+            encode_speed: EncodeSpeed = "fast",
+            src_fmts: dict[Path, str] | None = None,
+    ) -> None:
+        super().__init__()
+        # Без копии: очередь в окне не изменяется на месте, а только заменяется целиком
+        self._pairs = pairs
+        self._dry_run = dry_run
+        self._force_format = force_format
+        self._encode_speed = encode_speed
+        self._src_fmts = src_fmts
+        self._stop = threading.Event()
+
+    def stop(self) -> None:
+        """Просит прервать замену после пар, которые уже обрабатываются."""
+        self._stop.set()
+
+    def run(self) -> None:
+        """Обрабатывает все пары и сообщает о прогрессе."""
+        done = 0
+        batch: list[ReplaceResult] = []
+        timer = QElapsedTimer()
+        timer.start()
+        results = iter_replace_threaded(
+            self._pairs,
+            dry_run=self._dry_run,
+            force_format=self._force_format,
+            encode_speed=self._encode_speed,
+            src_fmts=self._src_fmts,
+        )
+        try:
+            # closing(): при остановке генератор закрывается и отменяет оставшиеся пары
+            with closing(results):
+                for res in results:
+                    done += 1
+                    batch.append(res)
+                    if self._stop.is_set():
+                        break
+                    if timer.elapsed() >= _EMIT_INTERVAL_MS:
+                        self.progressed.emit(done, batch)
+                        batch = []
+                        timer.restart()
+        except Exception as e:
+            if batch:
+                self.progressed.emit(done, batch)
+            self.failed.emit(str(e))
+        else:
+            if batch:
+                self.progressed.emit(done, batch)
+        self.finished.emit()